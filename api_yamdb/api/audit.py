@@ -0,0 +1,191 @@
+import re
+import uuid
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import User
+
+URL_KWARG = re.compile(r'\(\?P<(\w+)>[^)]*\)')
+ALIAS = re.compile(r'"(\w+)" (T\d+)\b')
+EQUALS = r'"{table}"\."(\w+)" (?:= |IN \(|IS NULL)'
+ORDER_BY = re.compile(r'ORDER BY (.*?)(?: LIMIT| OFFSET|\)|$)')
+ORDER_COLUMN = r'"{table}"\."(\w+)" (?:ASC|DESC)'
+
+# запросы с фильтрами, которые клиенты шлют чаще всего
+LIST_PARAMS = {
+    'titles': ('genre={genre}', 'category={category}', 'year=2000',
+               'genre={genre}&category={category}'),
+}
+ACTION_PARAMS = {
+    'suggest': 'q=про',
+    'scores': 'ids={title_id}',
+}
+
+
+def seed():
+    """
+    Create a small catalog with users, reviews and comments
+    and return url kwargs and objects to build urls from.
+    Slugs, usernames and emails get a random prefix, so the catalog
+    does not collide with data already in the database.
+    """
+    prefix = f'audit-{uuid.uuid4().hex[:8]}'
+    category = Category.objects.create(name='Фильм', slug=f'{prefix}-films')
+    genres = [
+        Genre.objects.create(name='Ужасы', slug=f'{prefix}-horror'),
+        Genre.objects.create(name='Комедия', slug=f'{prefix}-comedy')]
+    users = [User.objects.create_user(
+        username=f'{prefix}-{idx}', email=f'{prefix}-{idx}@yamdb.fake',
+        role=role) for idx, role in enumerate(
+            (User.USER_ROLE_ADMIN, User.USER_ROLE_MODERATOR,
+             User.USER_ROLE_USER))]
+    titles = []
+    for idx in range(3):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category)
+        title.genre.set(genres[:idx % 2 + 1])
+        titles.append(title)
+    for title in titles:
+        for score, user in enumerate(users, start=5):
+            review = Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score)
+            for author in users:
+                Comment.objects.create(
+                    review=review, author=author, text='Комментарий')
+    Title.objects.all().recalculate_rating()
+    review = Review.objects.filter(title=titles[0]).first()
+    objects = {
+        Category: category, Genre: genres[0], Title: titles[0],
+        Review: review, Comment: review.comments.first(), User: users[2],
+    }
+    kwargs = {'title_id': titles[0].id, 'review_id': review.id,
+              'genre': genres[0].slug, 'category': category.slug}
+    return users[0], kwargs, objects
+
+
+def get_urls(router, kwargs, objects):
+    """
+    Return urls of GET requests to every route of a router:
+    lists, list actions and details of the seeded objects.
+    """
+    root = reverse('api-root')
+    for prefix, viewset, basename in router.registry:
+        base = root + URL_KWARG.sub(
+            lambda match: str(kwargs[match.group(1)]), prefix) + '/'
+        if hasattr(viewset, 'list'):
+            yield base
+            for params in LIST_PARAMS.get(basename, ()):
+                yield f'{base}?{params.format(**kwargs)}'
+        for action in viewset.get_extra_actions():
+            if action.detail or 'get' not in action.mapping:
+                continue
+            url = f'{base}{action.url_path}/'
+            params = ACTION_PARAMS.get(action.url_path)
+            yield f'{url}?{params.format(**kwargs)}' if params else url
+        if hasattr(viewset, 'retrieve'):
+            model = (viewset.queryset.model if viewset.queryset is not None
+                     else viewset.serializer_class.Meta.model)
+            lookup = getattr(objects[model], viewset.lookup_field)
+            yield f'{base}{lookup}/'
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def find_problems(plan, sql):
+    """
+    Return (problem, table) pairs found in the lines of a query plan:
+    full table scans, temporary b-trees for sorting and grouping
+    and automatic indexes SQLite builds for a missing one.
+    A temporary b-tree is put on the outermost table of the plan,
+    the only one an index could give the rows in order from.
+    """
+    tables = set(connection.introspection.table_names())
+    aliases = {alias: table for table, alias in ALIAS.findall(sql)}
+    problems, outer = [], None
+    for detail in plan:
+        words = detail.split()
+        if words[0] in ('SCAN', 'SEARCH'):
+            table = aliases.get(words[1], words[1])
+            # подзапросы во FROM и таблицы FTS5 не проверяются
+            if table not in tables or 'VIRTUAL' in words:
+                continue
+            outer = outer or table
+            if 'AUTOMATIC' in words:
+                problems.append(('missing index', table))
+            elif words[0] == 'SCAN' and 'USING' not in words:
+                problems.append(('table scan', table))
+        elif detail.startswith('USE TEMP B-TREE') and outer:
+            problems.append((detail[len('USE '):].lower(), outer))
+    return problems
+
+
+def get_indexes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [constraint['columns'] for constraint in constraints.values()
+            if constraint['index'] or constraint['unique']]
+
+
+def propose_index(sql, table):
+    """
+    Return columns of an index serving the query on the table:
+    columns compared for equality, then columns of ORDER BY.
+    None if no such columns or an index already starts with them.
+    """
+    equal, ordered = [], []
+    where = sql.split(' WHERE ', 1)[1] if ' WHERE ' in sql else ''
+    where = ORDER_BY.split(where, 1)[0]
+    for column in re.findall(EQUALS.format(table=table), where):
+        if column not in equal:
+            equal.append(column)
+    order_by = ORDER_BY.search(sql)
+    if order_by:
+        for column in re.findall(ORDER_COLUMN.format(table=table),
+                                 order_by.group(1)):
+            if column not in equal and column not in ordered:
+                ordered.append(column)
+    columns = equal + ordered
+    if not columns:
+        return None
+    # столбцы равенства подходят в индексе в любом порядке
+    for index in get_indexes(table):
+        if (set(index[:len(equal)]) == set(equal)
+                and index[len(equal):len(columns)] == ordered):
+            return None
+    return tuple(columns)
+
+
+def audit(router):
+    """
+    Request every route of a router as an admin, explain every SELECT
+    and return a report: (url, status, [(sql, problems)]) for each url
+    and a set of (table, columns) of proposed indexes.
+    """
+    admin, kwargs, objects = seed()
+    client = APIClient()
+    client.force_authenticate(admin)
+    report, proposals = [], set()
+    for url in get_urls(router, kwargs, objects):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries = []
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            problems = find_problems(explain(sql), sql)
+            queries.append((sql, problems))
+            for problem, table in problems:
+                columns = propose_index(sql, table)
+                if columns:
+                    proposals.add((table, columns))
+        report.append((url, response.status_code, queries))
+    return report, proposals
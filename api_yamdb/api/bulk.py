@@ -0,0 +1,204 @@
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from reviews.models import Category, Genre, Title, TitleRanking
+
+from .cache import bump_generation
+from .serializers import TitleBulkSerializer
+from .suggest import title_index
+
+UPDATE_FIELDS = ('name', 'description', 'year', 'category', 'updated_at')
+
+
+def slug_error(value):
+    message = serializers.SlugRelatedField.default_error_messages[
+        'does_not_exist']
+    return str(message).format(slug_name='slug', value=value)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class TitleBulkLoader:
+    """
+    Loader to create and update many titles with a few queries.
+    Every item is validated on its own, then slugs of genres and
+    categories and ids of updated titles of the whole batch are
+    resolved with one query each. Titles are written with bulk_create
+    and bulk_update, genre links with bulk_create of the through model.
+    Signals are not sent by bulk writes, so the catalog generation,
+    the suggest index and rankings are updated here.
+    ...
+    Attributes
+    ----------
+    chunk_size: int
+        number of rows in one INSERT or UPDATE and, without atomic,
+        number of items written in one transaction
+
+    Methods
+    -------
+    load(items, atomic):
+        validate and write items, return results and errors per item
+    """
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+
+    def load(self, items, atomic=True):
+        if atomic:
+            entries, errors = self.validate(items)
+            if any(errors):
+                return None, errors
+            with transaction.atomic():
+                return self.write(entries), errors
+        results, errors = [], []
+        for chunk in chunks(items, self.chunk_size):
+            entries, chunk_errors = self.validate(chunk)
+            with transaction.atomic():
+                results.extend(self.write(entries))
+            errors.extend(chunk_errors)
+        return results, errors
+
+    def validate(self, items):
+        data, errors = [], []
+        for item in items:
+            if not isinstance(item, dict):
+                data.append(None)
+                errors.append(
+                    {'non_field_errors': ['Ожидается объект произведения.']})
+                continue
+            serializer = TitleBulkSerializer(data=item, partial='id' in item)
+            if serializer.is_valid():
+                data.append(serializer.validated_data)
+                errors.append({})
+            else:
+                data.append(None)
+                errors.append(serializer.errors)
+
+        valid = [item for item in data if item is not None]
+        genres = Genre.objects.in_bulk(
+            {slug for item in valid for slug in item.get('genre', ())},
+            field_name='slug')
+        categories = Category.objects.in_bulk(
+            {item['category'] for item in valid if 'category' in item},
+            field_name='slug')
+        titles = Title.objects.select_related('category').in_bulk(
+            {item['id'] for item in valid if 'id' in item})
+
+        entries, seen = [], set()
+        for index, item in enumerate(data):
+            if item is None:
+                entries.append(None)
+                continue
+            entry, item_errors = self.build_entry(
+                item, genres, categories, titles, seen)
+            entries.append(entry)
+            if item_errors:
+                errors[index] = item_errors
+        return entries, errors
+
+    def build_entry(self, item, genres, categories, titles, seen):
+        errors = {}
+        missing = [slug for slug in item.get('genre', ())
+                   if slug not in genres]
+        if missing:
+            errors['genre'] = [slug_error(slug) for slug in missing]
+        if 'category' in item and item['category'] not in categories:
+            errors['category'] = [slug_error(item['category'])]
+        title, error = self.get_title(item, titles, seen)
+        if error:
+            errors['id'] = [error]
+        if errors:
+            return None, errors
+
+        for field in ('name', 'description', 'year'):
+            if field in item:
+                setattr(title, field, item[field])
+        if 'category' in item:
+            title.category = categories[item['category']]
+        genre_ids = None
+        if 'genre' in item:
+            genre_ids = [genres[slug].id for slug in dict.fromkeys(
+                item['genre'])]
+        return (title, genre_ids), None
+
+    @staticmethod
+    def get_title(item, titles, seen):
+        if 'id' not in item:
+            return Title(), None
+        title = titles.get(item['id'])
+        if title is None:
+            return None, f'Произведение с id={item["id"]} не существует.'
+        if title.id in seen:
+            return None, 'Произведение встречается в запросе несколько раз.'
+        seen.add(title.id)
+        return title, None
+
+    def write(self, entries):
+        written = [entry for entry in entries if entry is not None]
+        created = [title for title, _ in written if title.pk is None]
+        updated = [title for title, _ in written if title.pk is not None]
+
+        Title.objects.bulk_create(created, batch_size=self.chunk_size)
+        if created and created[0].pk is None:
+            # SQLite не возвращает id из bulk_create. Вставка идет
+            # в транзакции, которая держит блокировку записи, поэтому
+            # новым строкам достались последние id в порядке вставки.
+            ids = list(Title.objects.order_by('-id').values_list(
+                'id', flat=True)[:len(created)])
+            for title, title_id in zip(created, reversed(ids)):
+                title.id = title_id
+
+        now = timezone.now()
+        for title in updated:
+            title.updated_at = now
+        Title.objects.bulk_update(
+            updated, UPDATE_FIELDS, batch_size=self.chunk_size)
+
+        through = Title.genre.through
+        updated_ids = {title.id for title in updated}
+        relinked = [title.id for title, genre_ids in written
+                    if genre_ids is not None and title.id in updated_ids]
+        for ids in chunks(relinked, self.chunk_size):
+            through.objects.filter(title_id__in=ids).delete()
+        through.objects.bulk_create([
+            through(title_id=title.id, genre_id=genre_id)
+            for title, genre_ids in written if genre_ids is not None
+            for genre_id in genre_ids
+        ], batch_size=self.chunk_size)
+        for ids in chunks(list(updated_ids), self.chunk_size):
+            TitleRanking.objects.refresh(ids)
+
+        transaction.on_commit(partial(
+            self.committed, [title for title, _ in written]))
+        return self.represent(entries)
+
+    @staticmethod
+    def committed(titles):
+        bump_generation()
+        for title in titles:
+            title_index.add(title)
+
+    def represent(self, entries):
+        # жанры в том же порядке, что и у TitleWriteSerializer
+        genres = {}
+        through = Title.genre.through
+        ids = [title.id for title, _ in filter(None, entries)]
+        for chunk in chunks(ids, self.chunk_size):
+            for title_id, slug in through.objects.filter(
+                    title_id__in=chunk).order_by(
+                    '-genre__slug').values_list('title_id', 'genre__slug'):
+                genres.setdefault(title_id, []).append(slug)
+        return [None if entry is None else {
+            'id': entry[0].id,
+            'name': entry[0].name,
+            'description': entry[0].description,
+            'year': entry[0].year,
+            'rating': entry[0].rating,
+            'genre': genres.get(entry[0].id, []),
+            'category': entry[0].category and entry[0].category.slug,
+        } for entry in entries]
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+
+from reviews.models import Category, Genre, Review, Title
+
+GENERATION_KEY = 'catalog:generation'
+HITS_KEY = 'catalog:hits'
+MISSES_KEY = 'catalog:misses'
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def increment(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # счетчик вытеснен из кэша или еще не создан
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def get_generation():
+    cache = get_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # случайное начальное значение, чтобы после вытеснения счетчика
+        # не совпасть с одним из прежних поколений
+        cache.add(GENERATION_KEY, uuid.uuid4().int >> 96, timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    get_generation()
+    return increment(GENERATION_KEY)
+
+
+def get_stats():
+    cache = get_cache()
+    return {
+        'generation': get_generation(),
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+def reset_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Review)
+@receiver(m2m_changed, sender=Title.genre.through)
+def catalog_changed(sender, **kwargs):
+    # новое поколение видно только после фиксации транзакции,
+    # иначе параллельный запрос закэширует еще старые данные
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_migrate)
+def database_flushed(sender, **kwargs):
+    bump_generation()
+
+
+class CatalogCacheMixin:
+    """
+    Mixin for a viewset to cache list and retrieve responses.
+    The cache key holds the catalog generation, the scheme and host
+    of absolute links, the action, url kwargs and normalized query
+    parameters. Any write to titles, genres,
+    categories or reviews bumps the generation, so stale entries are
+    never read again and simply expire.
+    ...
+    Attributes
+    ----------
+    uncached_params: tuple
+        query parameters that turn the cache off for a request
+
+    Methods
+    -------
+    list(), retrieve():
+        serve a response from the cache or cache a fresh one
+    get_cache_key():
+        build a cache key for the current request
+    """
+    uncached_params = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values if value != '')
+        # ссылки next и previous в ответе абсолютные:
+        # у каждого хоста и схемы свой ответ в кэше
+        raw = json.dumps(
+            [request.scheme, request.get_host(), self.basename,
+             self.action, self.kwargs, params],
+            sort_keys=True, default=str)
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'catalog:{get_generation()}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if any(request.query_params.get(param)
+               for param in self.uncached_params):
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            increment(HITS_KEY)
+            return Response(data, headers={'X-Cache': 'HIT'})
+        increment(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,246 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F
+
+from reviews.models import Title
+
+from .cache import get_generation
+
+MAGIC = b'YMDBCAT1'
+HEADER = struct.Struct('<8sQ')
+FILTERS = ('genre', 'category', 'year', 'name')
+SUPPORTED_PARAMS = frozenset(FILTERS + ('page', 'fields', 'exclude'))
+# кэши, которые не видны другим процессам сервера
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+BIT_POSITIONS = tuple(
+    tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+def align(offset):
+    return (offset + 7) // 8 * 8
+
+
+def build_snapshot(path):
+    """
+    Write a snapshot of the catalog to a file.
+    Titles are stored in list order (rating, then id, descending),
+    so a position in the snapshot is also a position in the list.
+    Layout: header, JSON metadata, array of title ids and one bitset
+    of row_bytes bytes per genre, category and year, where bit i is set
+    if title i belongs to it.
+    """
+    rows = list(Title.objects.order_by(
+        F('rating').desc(nulls_last=True), '-id',
+    ).values_list('id', 'year', 'category__slug', 'name'))
+    size = len(rows)
+    row_bytes = (size + 7) // 8
+    positions = {row[0]: index for index, row in enumerate(rows)}
+
+    bitsets = {}
+
+    def set_bit(key, index):
+        bitset = bitsets.setdefault(key, bytearray(row_bytes))
+        bitset[index >> 3] |= 1 << (index & 7)
+
+    for index, (_, year, category, _) in enumerate(rows):
+        set_bit(('year', str(year)), index)
+        if category is not None:
+            set_bit(('category', category), index)
+    for title_id, genre in Title.genre.through.objects.values_list(
+            'title_id', 'genre__slug'):
+        if title_id in positions:
+            set_bit(('genre', genre), positions[title_id])
+
+    keys = sorted(bitsets)
+    meta = json.dumps({
+        'size': size,
+        'bitsets': keys,
+        'names': [row[3] for row in rows],
+    }).encode()
+    header = HEADER.pack(MAGIC, len(meta)) + meta
+    header += bytes(align(len(header)) - len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(temporary, 'wb') as file:
+        file.write(header)
+        file.write(array('q', [row[0] for row in rows]).tobytes())
+        for key in keys:
+            file.write(bitsets[key])
+    # файл появляется под своим именем уже целиком,
+    # поэтому другие процессы не увидят его недописанным
+    os.replace(temporary, path)
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of a snapshot file mapped into memory.
+    Pages of the mapping are shared by all processes using the file.
+    ...
+    Methods
+    -------
+    query(genre, category, year, name):
+        return a bitset of titles matching all given filters
+    positions(mask, start, stop):
+        return positions of set bits of a bitset in a range
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_length = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a catalog snapshot')
+        meta = json.loads(
+            self.map[HEADER.size:HEADER.size + meta_length].decode())
+        self.size = meta['size']
+        self.row_bytes = (self.size + 7) // 8
+        offset = align(HEADER.size + meta_length)
+        self.ids = memoryview(self.map)[
+            offset:offset + 8 * self.size].cast('q')
+        offset += 8 * self.size
+        self.offsets = {}
+        for kind, key in meta['bitsets']:
+            self.offsets.setdefault(kind, {})[key] = offset
+            offset += self.row_bytes
+        self.names = {}
+        for index, name in enumerate(meta['names']):
+            self.names.setdefault(name, []).append(index)
+
+    def bitset(self, offset):
+        return int.from_bytes(
+            self.map[offset:offset + self.row_bytes], 'little')
+
+    def union(self, kind, value):
+        # genre и category фильтруются по вхождению подстроки в slug
+        value = value.casefold()
+        mask = 0
+        for key, offset in self.offsets.get(kind, {}).items():
+            if value in key.casefold():
+                mask |= self.bitset(offset)
+        return mask
+
+    def query(self, genre=None, category=None, year=None, name=None):
+        mask = (1 << self.size) - 1
+        if genre is not None:
+            mask &= self.union('genre', genre)
+        if category is not None:
+            mask &= self.union('category', category)
+        if year is not None:
+            offset = self.offsets.get('year', {}).get(str(year))
+            mask &= 0 if offset is None else self.bitset(offset)
+        if name is not None:
+            mask &= sum(1 << index for index in self.names.get(name, ()))
+        return mask
+
+    def positions(self, mask, start, stop):
+        data = mask.to_bytes(self.row_bytes, 'little')
+        found = (
+            index * 8 + bit
+            for index, byte in enumerate(data) if byte
+            for bit in BIT_POSITIONS[byte])
+        return list(islice(found, start, stop))
+
+
+class CatalogResult:
+    """
+    Ordered list of titles matched by the engine.
+    Length is a popcount, a slice loads only titles of the slice,
+    so a paginator can use it in place of a queryset.
+    """
+    def __init__(self, snapshot, mask, queryset):
+        self.snapshot = snapshot
+        self.mask = mask
+        self.queryset = queryset
+        self.length = bin(mask).count('1')
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(self.length)
+        ids = [self.snapshot.ids[position] for position in
+               self.snapshot.positions(self.mask, start, stop)]
+        titles = self.queryset.in_bulk(ids)
+        return [titles[title_id] for title_id in ids if title_id in titles]
+
+
+def check_cache():
+    # поколение каталога должно быть общим для всех процессов:
+    # с кэшем в памяти процесса другие процессы не узнают об изменении
+    # каталога и продолжат отвечать по старому снимку
+    backend = settings.CACHES[settings.CATALOG_CACHE_ALIAS]['BACKEND']
+    if backend in LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            'CATALOG_ENGINE_ENABLED requires a cache shared by all '
+            f'processes in CATALOG_CACHE_ALIAS, not {backend}')
+
+
+class CatalogEngine:
+    """
+    Engine to answer TitleFilter queries from a catalog snapshot
+    without SQL. The snapshot is bound to the catalog generation
+    of the response cache: after any change of the catalog the first
+    query builds a new snapshot file, the others map it.
+    The cache must be shared by all processes, such as FileBasedCache
+    or Memcached, otherwise ImproperlyConfigured is raised.
+    ...
+    Methods
+    -------
+    filter_titles(params, queryset):
+        return titles matching query parameters,
+        or None if the engine can not answer them
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.snapshot = None
+
+    def get_snapshot(self):
+        generation = get_generation()
+        if generation == self.generation:
+            return self.snapshot
+        with self.lock:
+            if generation != self.generation:
+                check_cache()
+                directory = Path(settings.CATALOG_SNAPSHOT_DIR)
+                path = directory / f'catalog-{generation}.bin'
+                try:
+                    snapshot = CatalogSnapshot(path)
+                except FileNotFoundError:
+                    build_snapshot(path)
+                    snapshot = CatalogSnapshot(path)
+                    for old in directory.glob('catalog-*.bin'):
+                        if old != path:
+                            old.unlink(missing_ok=True)
+                self.snapshot = snapshot
+                self.generation = generation
+        return self.snapshot
+
+    def filter_titles(self, params, queryset):
+        if not set(params) <= SUPPORTED_PARAMS:
+            return None
+        filters = {
+            name: params[name] for name in FILTERS if params.get(name)}
+        if 'year' in filters:
+            if not filters['year'].isdigit():
+                return None
+            filters['year'] = int(filters['year'])
+        snapshot = self.get_snapshot()
+        return CatalogResult(snapshot, snapshot.query(**filters), queryset)
+
+
+catalog_engine = CatalogEngine()
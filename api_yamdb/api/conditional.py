@@ -0,0 +1,137 @@
+import hashlib
+
+from django.db.models import Count, Max, QuerySet
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from reviews.models import Category, Genre, Title
+
+
+def get_validators(querysets, variant=''):
+    """
+    Return an ETag, a Last-Modified timestamp and the number of rows
+    of the first of sets of rows. Every set costs one aggregate query
+    over the latest update time and the number of rows. Adding,
+    changing or deleting a row changes at least one of them.
+    """
+    parts, timestamps, counts = [variant], [], []
+    for queryset in querysets:
+        values = queryset.order_by().aggregate(
+            last_modified=Max('updated_at'), count=Count('pk'))
+        last_modified = values['last_modified']
+        parts.append(last_modified.isoformat() if last_modified else '')
+        parts.append(str(values['count']))
+        if last_modified is not None:
+            timestamps.append(last_modified)
+        counts.append(values['count'])
+    etag = quote_etag(hashlib.md5(':'.join(parts).encode()).hexdigest())
+    last_modified = None
+    if timestamps:
+        last_modified = int(max(timestamps).timestamp())
+    return etag, last_modified, counts[0]
+
+
+def touch_titles(titles):
+    # жанры и категории выводятся внутри произведений,
+    # поэтому их изменение меняет и представление произведений
+    titles.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def genre_changed(sender, instance, **kwargs):
+    touch_titles(Title.objects.filter(genre=instance))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if action in ('post_add', 'post_remove'):
+        if reverse:
+            touch_titles(Title.objects.filter(pk__in=pk_set))
+        else:
+            touch_titles(Title.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear':
+        if reverse:
+            touch_titles(Title.objects.filter(genre=instance))
+        else:
+            touch_titles(Title.objects.filter(pk=instance.pk))
+
+
+class ConditionalListMixin:
+    """
+    Mixin for a viewset to answer conditional list requests.
+    Validators of the requested rows are computed with one query
+    before the queryset is evaluated, so a request with a matching
+    If-None-Match or a fresh If-Modified-Since gets 304 Not Modified
+    without loading and serializing the rows.
+    Lists have no Last-Modified: deleting a row that is not the latest
+    one does not move the latest update time, only the ETag
+    with the number of rows changes.
+    ...
+    Methods
+    -------
+    list():
+        answer 304 or a full response with ETag
+    get_validated_queryset():
+        return rows the validators are computed from,
+        a queryset or a list of querysets
+    get_known_count():
+        return the number of listed rows counted with the validators
+    """
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def get_validated_queryset(self):
+        if self.action == 'list':
+            return self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+
+    def get_known_count(self):
+        return getattr(self, 'validated_count', None)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        querysets = self.get_validated_queryset()
+        if isinstance(querysets, QuerySet):
+            querysets = [querysets]
+        if not isinstance(querysets, list):
+            return handler(request, *args, **kwargs)
+        # у разных форматов ответа (json, api) свой ETag
+        etag, last_modified, count = get_validators(
+            querysets, request.accepted_renderer.format)
+        # число строк списка уже посчитано, пагинации незачем считать снова
+        self.validated_count = count if self.action == 'list' else None
+        if self.action == 'list':
+            last_modified = None
+        elif not count:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(
+            request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """
+    Mixin for a viewset to answer conditional list
+    and retrieve requests.
+    """
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,111 @@
+import re
+
+from rest_framework.exceptions import ValidationError
+
+from reviews.models import Comment
+
+from .fast import get_plan
+from .serializers import (CommmentSerializer, ReviewSerializer,
+                          TitleDetailSerializer)
+from .window import top_n_per_group
+
+# число вложенных строк по умолчанию и наибольшее
+EMBED_LIMITS = {
+    'reviews': (10, 100),
+    'comments': (3, 20),
+}
+EMBED_PATTERN = re.compile(r'^(reviews|comments)(?::(\d+))?$')
+
+
+def parse_embed(value):
+    """
+    Parse ?embed=reviews[:N],comments[:M] into a dict of limits.
+    """
+    embed = {}
+    for part in filter(None, (part.strip() for part in value.split(','))):
+        match = EMBED_PATTERN.match(part)
+        if match is None:
+            raise ValidationError(
+                {'embed': [f'Неизвестное вложение: {part}.']})
+        name, limit = match.groups()
+        default, maximum = EMBED_LIMITS[name]
+        embed[name] = max(1, min(int(limit) if limit else default, maximum))
+    if 'comments' in embed and 'reviews' not in embed:
+        raise ValidationError({'embed': [
+            'Комментарии вкладываются только вместе с отзывами.']})
+    return embed
+
+
+def represent(queryset, serializer_class):
+    # строки читаются по плану быстрого пути, без сериализатора
+    plan = get_plan(serializer_class())
+    if plan is None:
+        return serializer_class(queryset, many=True).data
+    return plan.convert(list(queryset.values_list(*plan.lookups)))
+
+
+def embed_reviews(title, embed):
+    """
+    Return the first reviews of a title and, if asked, the first
+    comments of each of them. Reviews are one query with LIMIT,
+    comments of all the reviews are one query with ROW_NUMBER()
+    over every review.
+    """
+    reviews = represent(
+        title.reviews.all()[:embed['reviews']], ReviewSerializer)
+    if 'comments' not in embed:
+        return reviews
+    return embed_comments(reviews, embed['comments'])
+
+
+def parse_include_comments(value):
+    """
+    Parse ?include_comments=N into a number of comments
+    per review, None if the parameter is not given or is 0.
+    """
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValidationError({'include_comments': [
+            'Укажите число комментариев к каждому отзыву.']})
+    # 0 - комментарии не нужны, как и без параметра
+    return min(int(value), EMBED_LIMITS['comments'][1]) or None
+
+
+def embed_comments(reviews, limit):
+    """
+    Add the latest limit comments to each of represented reviews.
+    Comments of all the reviews are one query with ROW_NUMBER()
+    over every review, a popular review gives no more than limit rows.
+    """
+    if not reviews:
+        return reviews
+    if any('id' not in review for review in reviews):
+        raise ValidationError({'include_comments': [
+            'Комментарии вкладываются только вместе с id отзыва.']})
+    comments = {}
+    for comment in represent(top_n_per_group(
+            Comment.objects.filter(
+                review__in=[review['id'] for review in reviews]),
+            'review', limit), CommmentSerializer):
+        comments.setdefault(comment['review'], []).append(comment)
+    for review in reviews:
+        review['comments'] = comments.get(review['id'], [])
+    return reviews
+
+
+class TitleEmbedSerializer(TitleDetailSerializer):
+    """
+    Serializer for RETRIEVE method on Title model
+    with embedded reviews and comments
+    ...
+    Methods
+    -------
+    to_representation():
+        add number of reviews and the first reviews to a title
+    """
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['reviews_count'] = instance.reviews_count
+        data['reviews'] = embed_reviews(instance, self.context['embed'])
+        return data
@@ -0,0 +1,207 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# поля, чье представление совпадает со значением из базы
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.FloatField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+plans = {}
+
+
+class Unsupported(Exception):
+    """Serializer field that the fast path can not reproduce."""
+
+
+class FastPlan:
+    """
+    Precompiled conversion of values_list() rows into the data
+    of a serializer. Built once from the readable fields of a serializer:
+    every field becomes a getter reading its column of a row,
+    nested serializers of a foreign key read joined columns of the same
+    row, nested serializers with many=True are loaded for a whole page
+    with one query per relation.
+    ...
+    Attributes
+    ----------
+    lookups: list
+        arguments for values_list(), the row layout
+    getters: list
+        pairs of a field name and a function of a row and the loaded
+        many-to-many values
+
+    Methods
+    -------
+    convert(rows):
+        return serializer data for a list of rows
+    """
+    def __init__(self, serializer, key=None):
+        model = serializer.Meta.model
+        self.lookups = []
+        self.relations = []
+        self.key_index = self.add_lookup(key or model._meta.pk.name)
+        self.getters = self.compile(serializer, model, '')
+
+    def add_lookup(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.lookups.index(lookup)
+
+    def compile(self, serializer, model, prefix):
+        getters = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*' or '.' in field.source:
+                raise Unsupported(name)
+            getters.append(
+                (name, self.compile_field(field, model, prefix)))
+        return getters
+
+    def compile_field(self, field, model, prefix):
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise Unsupported(field.field_name)
+        lookup = prefix + field.source
+        if isinstance(field, serializers.ListSerializer):
+            if prefix or not model_field.many_to_many or not isinstance(
+                    field.child, serializers.ModelSerializer):
+                raise Unsupported(field.field_name)
+            return self.compile_many(field.child, model_field)
+        if model_field.is_relation or isinstance(
+                field, serializers.RelatedField):
+            if not model_field.many_to_one:
+                raise Unsupported(field.field_name)
+            return self.compile_related(field, model_field, lookup)
+        if isinstance(field, IDENTITY_FIELDS):
+            return self.compile_column(lookup, None)
+        return self.compile_column(lookup, field.to_representation)
+
+    def compile_related(self, field, model_field, lookup):
+        if isinstance(field, serializers.ModelSerializer):
+            # вложенный сериализатор читает столбцы из JOIN той же строки
+            index = self.add_lookup(lookup)
+            nested = self.compile(
+                field, model_field.related_model, lookup + '__')
+
+            def get_nested(row, related):
+                if row[index] is None:
+                    return None
+                return {name: get(row, related) for name, get in nested}
+            return get_nested
+        if isinstance(field, serializers.SlugRelatedField):
+            target = model_field.related_model._meta.pk
+            if field.slug_field not in (target.name, 'pk'):
+                lookup += '__' + field.slug_field
+            return self.compile_column(lookup, None)
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            return self.compile_column(lookup, None)
+        raise Unsupported(field.field_name)
+
+    def compile_column(self, lookup, to_representation):
+        index = self.add_lookup(lookup)
+        if to_representation is None:
+            return lambda row, related: row[index]
+
+        def get_value(row, related):
+            value = row[index]
+            return None if value is None else to_representation(value)
+        return get_value
+
+    def compile_many(self, child, model_field):
+        # значения связи для страницы читаются одним запросом
+        # в порядке по умолчанию связанной модели, как и в prefetch
+        position = len(self.relations)
+        query_name = model_field.related_query_name()
+        nested = FastPlan(child, key=f'{query_name}__pk')
+        if nested.relations:
+            raise Unsupported(model_field.name)
+        self.relations.append((model_field.related_model, query_name, nested))
+        key_index = self.key_index
+        return lambda row, related: related[position].get(
+            row[key_index], [])
+
+    def load_relations(self, rows):
+        ids = [row[self.key_index] for row in rows]
+        related = []
+        for model, query_name, nested in self.relations:
+            values = defaultdict(list)
+            if ids:
+                for row in model.objects.filter(**{
+                        f'{query_name}__in': ids,
+                }).values_list(*nested.lookups):
+                    values[row[nested.key_index]].append(
+                        {name: get(row, ()) for name, get in nested.getters})
+            related.append(values)
+        return related
+
+    def convert(self, rows):
+        rows = list(rows)
+        related = self.load_relations(rows)
+        getters = self.getters
+        return [{name: get(row, related) for name, get in getters}
+                for row in rows]
+
+
+def get_plan(serializer):
+    # набор полей меняется от ?fields= и ?exclude=
+    key = (type(serializer), tuple(serializer.fields))
+    if key not in plans:
+        try:
+            plans[key] = FastPlan(serializer)
+        except Unsupported:
+            plans[key] = None
+    return plans[key]
+
+
+class FastListMixin:
+    """
+    Mixin for a viewset to answer list requests without serializers.
+    Rows of the page are read with values_list() and turned into
+    response data by a plan compiled from the serializer once,
+    so the response is the same as the serializer would give.
+    Falls back to the serializer when the plan can not reproduce
+    a field, for cursor pagination and for non-queryset results.
+    ...
+    Methods
+    -------
+    list():
+        list objects by the fast path when possible
+    get_fast_plan(queryset):
+        return a plan for the request or None
+    """
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        plan = self.get_fast_plan(queryset)
+        if plan is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        rows = queryset.prefetch_related(None).values_list(*plan.lookups)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.convert(page))
+        return Response(plan.convert(rows))
+
+    def get_fast_plan(self, queryset):
+        if not settings.FAST_READ_PATH or not isinstance(queryset, QuerySet):
+            return None
+        paginator = self.paginator
+        if paginator is not None and hasattr(paginator, 'use_cursor') and (
+                paginator.use_cursor(self.request)):
+            return None
+        return get_plan(self.get_serializer())
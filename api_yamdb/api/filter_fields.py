@@ -2,13 +2,19 @@ import django_filters
 
 from reviews.models import Title
 
+from .search import full_text_search
+
 
 class TitleFilter(django_filters.FilterSet):
     genre = django_filters.CharFilter(
         field_name='genre__slug', lookup_expr='icontains')
     category = django_filters.CharFilter(
         field_name='category__slug', lookup_expr='icontains')
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['name', 'year', 'genre', 'category']
+        fields = ['name', 'year', 'genre', 'category', 'search']
+
+    def filter_search(self, queryset, name, value):
+        return full_text_search(queryset, value, ('name', 'description'))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.audit import audit
+from api.cache import bump_generation
+from api.urls import router_v1
+
+
+class Command(BaseCommand):
+    help = ("Запрашивает все маршруты API на тестовых данных и проверяет "
+            "планы SQL-запросов: полные просмотры таблиц, сортировки "
+            "во временных B-деревьях и недостающие индексы")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Выводить и запросы без замечаний')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN есть только в SQLite')
+        # тестовые данные не сохраняются, а кэш с ними сбрасывается
+        bump_generation()
+        with transaction.atomic():
+            report, proposals = audit(router_v1)
+            transaction.set_rollback(True)
+        bump_generation()
+
+        flagged = 0
+        for url, status, queries in report:
+            self.stdout.write(f'GET {url} {status}, запросов: {len(queries)}')
+            for sql, problems in queries:
+                if not problems and not options['all']:
+                    continue
+                flagged += bool(problems)
+                for problem, table in problems:
+                    self.stdout.write(f'  ! {table}: {problem}')
+                self.stdout.write(f'    {sql}')
+        self.stdout.write(f'Запросов с замечаниями: {flagged}')
+        for table, columns in sorted(proposals):
+            name = '_'.join((table, *columns, 'idx'))
+            self.stdout.write(
+                f'CREATE INDEX "{name}" ON "{table}" ({", ".join(columns)});')
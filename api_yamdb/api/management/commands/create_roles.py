@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from users.permissions import create_roles_and_permissions
+
+
+class Command(BaseCommand):
+    help = ("Создает группы пользователей и права доступа, которых "
+            "еще нет. То же делается после каждого migrate")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='База данных для групп и прав')
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=options['database']):
+            groups = create_roles_and_permissions(options['database'])
+        for group in groups:
+            self.stdout.write(
+                f'{group.name}: прав {group.permissions.count()}')
@@ -5,7 +5,8 @@ import os
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, Review, ScoreHistogram,
+                            Title, TitleRanking)
 
 User = get_user_model()
 
@@ -73,6 +74,9 @@ class Command(BaseCommand):
                                              author=author,
                                              score=row['score'],
                                              pub_date=row['pub_date'])
+        Title.objects.recalculate_rating()
+        ScoreHistogram.objects.recalculate()
+        TitleRanking.objects.refresh()
 
     def import_comments(self):
         with io.open(DATAFOLDER + 'comments.csv', encoding='utf-8') as f:
@@ -84,3 +88,4 @@ class Command(BaseCommand):
                                               text=row['text'],
                                               author=author,
                                               pub_date=row['pub_date'])
+        Review.objects.recalculate_comments()
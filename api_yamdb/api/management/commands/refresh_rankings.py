@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    help = ("Пересчитывает рейтинги лучших произведений "
+            "с актуальной средней оценкой по всем произведениям")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            TitleRanking.objects.refresh()
+        self.stdout.write(
+            f'Позиций в рейтингах: {TitleRanking.objects.count()}')
@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import deliver
+
+
+class Command(BaseCommand):
+    help = ("Отправляет письма из очереди пачками через одно соединение "
+            "с почтовым сервером. С --loop работает постоянно")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+                            help='Писем в одной пачке')
+        parser.add_argument('--loop', action='store_true',
+                            help='Не завершаться, ждать новых писем')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent + failed == options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(settings.EMAIL_OUTBOX_POLL_INTERVAL)
+        self.stdout.write(
+            f'Отправлено писем: {total_sent}, с ошибкой: {total_failed}')
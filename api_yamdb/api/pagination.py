@@ -0,0 +1,345 @@
+import base64
+import binascii
+import hashlib
+import json
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .cache import get_cache, get_generation
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a compound (ordering_field, id) key.
+    Both parts of the key are descending, id is a unique tiebreaker,
+    so every page is an index range scan from the position stored
+    in an opaque cursor and does not depend on how deep the page is.
+    Rows inserted concurrently do not shift pages already handed out.
+    ...
+    Attributes
+    ----------
+    ordering_field: str
+        name of the model field rows are ordered by, descending
+    nullable: bool
+        whether ordering_field can be NULL, NULL rows go last
+    page_size: int
+        number of rows on a page
+    cursor_query_param: str
+        name of the query parameter with the cursor
+
+    Methods
+    -------
+    paginate_queryset():
+        return rows of the page requested by the cursor
+    get_paginated_response():
+        wrap page rows with next and previous links
+    """
+    ordering_field = None
+    nullable = False
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.field = queryset.model._meta.get_field(self.ordering_field)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['reverse']
+
+        rows = []
+        for segment in self.get_segments(queryset, cursor):
+            rows.extend(segment[:self.page_size + 1 - len(rows)])
+            if len(rows) > self.page_size:
+                break
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        self.next_cursor = None
+        self.previous_cursor = None
+        if rows and has_next:
+            self.next_cursor = self.encode_cursor(rows[-1], reverse=False)
+        if rows and has_previous:
+            self.previous_cursor = self.encode_cursor(rows[0], reverse=True)
+        return rows
+
+    def get_segments(self, queryset, cursor):
+        # Каждый сегмент - отдельный поиск по индексу. Строки с NULL
+        # идут последними и выбираются отдельным сегментом, чтобы условие
+        # по ключу оставалось диапазоном по индексу.
+        name = self.ordering_field
+        descending = ('-' + name, '-id')
+        ascending = (name, 'id')
+        if self.nullable:
+            values = queryset.filter(**{f'{name}__isnull': False})
+            nulls = queryset.filter(**{f'{name}__isnull': True})
+        else:
+            values, nulls = queryset, None
+
+        if cursor is None:
+            segments = [values.order_by(*descending)]
+            if nulls is not None:
+                segments.append(nulls.order_by('-id'))
+            return segments
+
+        value, pk = cursor['value'], cursor['id']
+        if not cursor['reverse']:
+            if value is None:
+                return [nulls.filter(id__lt=pk).order_by('-id')]
+            segments = [values.filter(
+                Q(**{f'{name}__lte': value}),
+                Q(**{f'{name}__lt': value}) | Q(id__lt=pk),
+            ).order_by(*descending)]
+            if nulls is not None:
+                segments.append(nulls.order_by('-id'))
+            return segments
+
+        if value is None:
+            return [nulls.filter(id__gt=pk).order_by('id'),
+                    values.order_by(*ascending)]
+        return [values.filter(
+            Q(**{f'{name}__gte': value}),
+            Q(**{f'{name}__gt': value}) | Q(id__gt=pk),
+        ).order_by(*ascending)]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            value = data['v']
+            if value is not None:
+                value = self.field.to_python(value)
+            return {'value': value, 'id': int(data['id']),
+                    'reverse': bool(data['r'])}
+        except (TypeError, ValueError, KeyError, binascii.Error,
+                ValidationError) as error:
+            raise NotFound(self.invalid_cursor_message) from error
+
+    def encode_cursor(self, row, reverse):
+        value = getattr(row, self.field.attname)
+        data = {
+            'v': None if value is None else self.field.value_to_string(row),
+            'id': row.id,
+            'r': reverse,
+        }
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.next_cursor),
+            ('previous', self.previous_cursor),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class TitleCursorPagination(KeysetPagination):
+    ordering_field = 'rating'
+    nullable = True
+
+
+class PubDateCursorPagination(KeysetPagination):
+    ordering_field = 'pub_date'
+
+
+class CursorOptInMixin:
+    """
+    Mixin for a pagination class to switch to keyset pagination
+    when the client asks for it with ?pagination=cursor
+    or passes a cursor from a previous response.
+    """
+    cursor_pagination_class = None
+    cursor_opt_in_param = 'pagination'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.cursor_opt_in_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class CountedPaginator(Paginator):
+    """Django paginator with the number of objects known in advance."""
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
+def get_count_cache_key(queryset):
+    # ключ сбрасывается только записью в каталог (api.cache),
+    # для списков других моделей кэш счетчика вернул бы старое число
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    raw = json.dumps([sql, params], default=str)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'count:{get_generation()}:{digest}'
+
+
+def get_cheap_count(queryset, view=None):
+    """
+    Return the number of rows of a queryset and whether it is
+    an estimate, avoiding a full COUNT(*) where possible:
+    a counter stored by the view, a count cached for the same filter
+    or a COUNT(*) stopped after PAGINATION_COUNT_CAP rows. Beyond the cap
+    the cap itself is returned as an estimate.
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset), False
+    get_known_count = getattr(view, 'get_known_count', None)
+    if get_known_count is not None:
+        count = get_known_count()
+        if count is not None:
+            return count, False
+    try:
+        key = get_count_cache_key(queryset)
+    except EmptyResultSet:
+        return 0, False
+    cache = get_cache()
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    cap = settings.PAGINATION_COUNT_CAP
+    count = queryset.order_by()[:cap + 1].count()
+    result = (min(count, cap), count > cap)
+    cache.set(key, result, settings.PAGINATION_COUNT_TIMEOUT)
+    return result
+
+
+class CheapCountMixin:
+    """
+    Mixin for a pagination class to count rows cheaply.
+    The count comes from get_cheap_count(). If it is an estimate,
+    or the client turned counts off with ?count=false, the page is read
+    with one extra row to know if there is a next page, and the response
+    has an approximate count or no count at all.
+    ...
+    Methods
+    -------
+    use_count(count):
+        make the base pagination use a count known in advance
+    paginate_without_count(queryset, request):
+        read a page and detect the next one without counting
+    """
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_shown = request.query_params.get(
+            self.count_query_param, '').lower() not in ('false', '0')
+        self.estimate = None
+        if not self.count_shown:
+            return self.paginate_without_count(queryset, request)
+        count, approximate = get_cheap_count(queryset, view)
+        if approximate:
+            self.estimate = count
+            return self.paginate_without_count(queryset, request)
+        self.use_count(count)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_shown and self.estimate is None:
+            return response
+        items = [(key, value) for key, value in response.data.items()
+                 if key != 'count']
+        if self.estimate is not None:
+            items = [('count', self.estimate), ('approximate', True)] + items
+        response.data = OrderedDict(items)
+        return response
+
+
+class CountedPageNumberPagination(CheapCountMixin, PageNumberPagination):
+    def use_count(self, count):
+        self.django_paginator_class = partial(CountedPaginator, count=count)
+
+    def paginate_without_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        number = request.query_params.get(self.page_query_param, 1)
+        try:
+            number = int(number)
+            if number < 1:
+                raise ValueError('That page number is less than 1')
+        except ValueError as error:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=number, message=str(error)))
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=number, message='That page contains no results'))
+        # число строк до конца этой страницы и одна строка следующей:
+        # этого хватает для ссылок next и previous
+        paginator = CountedPaginator(
+            queryset, page_size, count=offset + len(rows))
+        self.page = Page(rows[:page_size], number, paginator)
+        self.request = request
+        return list(self.page)
+
+
+class CountedLimitOffsetPagination(CheapCountMixin, LimitOffsetPagination):
+    def use_count(self, count):
+        self.known_count = count
+
+    def get_count(self, queryset):
+        return self.known_count
+
+    def paginate_without_count(self, queryset, request):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.count = self.offset + len(rows)
+        return rows[:self.limit]
+
+
+class TitlePagination(CursorOptInMixin, CountedPageNumberPagination):
+    cursor_pagination_class = TitleCursorPagination
+
+
+class PubDatePagination(CursorOptInMixin, CountedLimitOffsetPagination):
+    cursor_pagination_class = PubDateCursorPagination
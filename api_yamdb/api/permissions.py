@@ -12,7 +12,7 @@ class ReviewCommentPermissions(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or (request.user == obj.author
+            or (obj.author_id == request.user.id
                 and request.user.role == User.USER_ROLE_USER)
             or (request.user.is_authenticated
                 and request.user.role == User.USER_ROLE_ADMIN)
@@ -36,3 +36,10 @@ class IsAdmin(permissions.BasePermission):
             and request.user.role == User.USER_ROLE_ADMIN
         ):
             return True
+
+
+class IsModerator(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return (request.user.is_authenticated
+                and request.user.role in (User.USER_ROLE_MODERATOR,
+                                          User.USER_ROLE_ADMIN))
@@ -0,0 +1,62 @@
+import html
+import re
+
+from django.db import connection
+from django.db.models import CharField, Q, Value
+
+# SQLite отмечает совпадения управляющими символами, а не тегами:
+# текст сниппета экранируется до того, как в него вставляются теги
+SNIPPET_START = chr(2)
+SNIPPET_END = chr(3)
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+
+def build_match_query(text):
+    # каждое слово запроса ищется как префикс, слова объединяются по И;
+    # кавычки не дают пользовательскому вводу попасть в синтаксис FTS5
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def full_text_search(queryset, text, fields):
+    """
+    Filter a queryset by a full-text query over the given fields.
+    On SQLite the FTS5 index of the model table is joined once: rows
+    are ordered by relevance and annotated with a snippet, where matches
+    are marked with SNIPPET_START and SNIPPET_END (see highlight()).
+    On other databases falls back to icontains without ranking.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+    if connection.vendor != 'sqlite':
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f'{field}__icontains': text})
+        return queryset.filter(condition).annotate(
+            search_snippet=Value(None, output_field=CharField()))
+
+    table = queryset.model._meta.db_table
+    fts = f'{table}_fts'
+    return queryset.extra(
+        select={
+            'search_rank': f'{fts}.rank',
+            'search_snippet': f'snippet({fts}, -1, char(2), char(3), %s, %s)',
+        },
+        select_params=(SNIPPET_ELLIPSIS, SNIPPET_TOKENS),
+        tables=(fts,),
+        where=(f'{fts}.rowid = {table}.id', f'{fts} MATCH %s'),
+        params=(match,),
+    ).order_by('search_rank', '-id')
+
+
+def highlight(snippet):
+    """
+    Return a snippet as HTML: the text is escaped,
+    matches are wrapped in <b> tags.
+    """
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(
+        SNIPPET_START, '<b>').replace(SNIPPET_END, '</b>')
@@ -1,18 +1,52 @@
+from django.conf import settings
 from django.contrib.auth.models import Group
 from django.shortcuts import get_object_or_404
 from django.core import validators
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from rest_framework import status
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from users.permissions import create_roles_and_permissions
+from .search import highlight
 from .service import generate_confirmation_code, send_confirmation_email
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, Review, ScoreHistogram,
+                            Title, TitleRanking)
 from users.models import User
 
 
+def get_field_names(request, param):
+    value = request.query_params.get(param, '')
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Mixin for a serializer to return only the fields listed
+    in ?fields= and drop the fields listed in ?exclude= on GET requests.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method != 'GET':
+            return
+        fields = get_field_names(request, 'fields')
+        exclude = get_field_names(request, 'exclude')
+        for name in list(self.fields):
+            if (fields and name not in fields) or name in exclude:
+                self.fields.pop(name)
+
+
+class SnippetField(serializers.ReadOnlyField):
+    """
+    Field for a full-text search snippet, returned as escaped HTML
+    with matches wrapped in <b> tags.
+    """
+    def to_representation(self, value):
+        return highlight(value)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
     Serializer for a User model
@@ -30,9 +64,8 @@ class UserSerializer(serializers.ModelSerializer):
     validate_username:
         check username field
     create:
-        create user and/or update confirmation code
-    confirmation_code_update:
-        update user confirmation code field and send to email
+        create user or update confirmation code,
+        send the code to email
     """
     username = serializers.CharField(
         max_length=150,
@@ -49,24 +82,28 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('username', 'email')
 
     def validate(self, data):
-        # если email существует, а username - нет,
+        # пользователи с таким username или email - одним запросом
+        users = list(User.objects.filter(
+            Q(username=data['username']) | Q(email=data['email'])).only(
+                'id', 'username', 'email')[:2])
+        self.user = next((
+            user for user in users if user.username == data['username']
+            and user.email == data['email']), None)
+        if self.user is not None:
+            return data
+        errors = {}
+        # если email существует, а username ему не соответствует,
         # то возвращаем ошибку
-        if User.objects.filter(
-            email=data['email']).exists() and not User.objects.filter(
-                username=data['username']).exists():
-            raise serializers.ValidationError(
-                {'email': 'username не соответствует данному email.'},
-                code=status.HTTP_400_BAD_REQUEST)
-        # если username существует, а email - нет,
+        if any(user.email == data['email'] for user in users):
+            errors['email'] = 'username не соответствует данному email.'
+        # если username существует, а email ему не соответствует,
         # то возвращаем ошибку
-        elif not User.objects.filter(
-            email=data['email']).exists() and User.objects.filter(
-                username=data['username']).exists():
+        if any(user.username == data['username'] for user in users):
+            errors['username'] = 'email не соответствует данному username.'
+        if errors:
             raise serializers.ValidationError(
-                {'username': 'email не соответствует данному username.'},
-                code=status.HTTP_400_BAD_REQUEST)
-        else:
-            return data
+                errors, code=status.HTTP_400_BAD_REQUEST)
+        return data
 
     def validate_username(self, value):
         if value == 'me':
@@ -75,30 +112,21 @@ class UserSerializer(serializers.ModelSerializer):
         return value
 
     def create(self, validated_data):
-        create_roles_and_permissions()
+        confirmation_code = generate_confirmation_code()
         # если такой пользователь существует - обновляем код подтверждения
-        user = User.objects.filter(
-            username=validated_data['username'],
-            email=validated_data["email"]
-        )
-        if user.exists():
-            self.confirmation_code_update(user=user.first())
-            return user.first()
-        # если пользователя нет - создаем его
+        if self.user is not None:
+            self.user.confirmation_code = confirmation_code
+            self.user.save(update_fields=['confirmation_code'])
+            user = self.user
+        # если пользователя нет - создаем его сразу с кодом
         else:
             user = User.objects.create(
                 email=validated_data['email'],
                 username=validated_data['username'],
+                confirmation_code=confirmation_code,
             )
-            self.confirmation_code_update(user=user)
-            return user
-
-    def confirmation_code_update(self, user: User) -> None:
-        # функция для обновления кода подтверждения
-        confirmation_code = generate_confirmation_code()
-        user.confirmation_code = generate_confirmation_code()
-        user.save()
         send_confirmation_email(user.email, confirmation_code)
+        return user
 
 
 class UserTokenSerializer(TokenObtainPairSerializer):
@@ -193,7 +221,7 @@ class UsersSerializer(serializers.ModelSerializer):
     Methods
     -------
     create():
-        validate a role of a user with Group model
+        give a new user the user role if no role is set
     """
     class Meta:
         fields = ("username", "email", "first_name", "last_name", "bio",
@@ -201,12 +229,11 @@ class UsersSerializer(serializers.ModelSerializer):
         model = User
 
     def create(self, validated_data):
-        role = validated_data.get('role', Group.objects.get(name='user'))
-        validated_data['role'] = role
+        validated_data.setdefault('role', User.USER_ROLE_USER)
         return super().create(validated_data)
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for a Review model
     ...
@@ -216,14 +243,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         link of a title, on which review was written
     author: User
         link of a user, which write a review
-
-    Methods
-    -------
-    validate():
-        check if user already create a review on current title
     """
-    title = serializers.SlugRelatedField(
-        slug_field='id', read_only=True)
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True,
         default=serializers.CurrentUserDefault()
@@ -231,20 +252,27 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         fields = '__all__'
+        read_only_fields = ('comments_count', 'last_comment_at')
         model = Review
 
-    def validate(self, data):
-        author = self.context['request'].user
-        title_id = self.context.get('view').kwargs.get('title_id')
-        if (
-            self.context['request'].method == 'POST'
-            and Review.objects.filter(author=author, title=title_id).exists()
-        ):
-            raise serializers.ValidationError('Вы уже написали свой отзыв!')
-        return data
 
+class ReviewSearchSerializer(ReviewSerializer):
+    """
+    Serializer for reviews found by a full-text query
+    ...
+    Attributes
+    ----------
+    snippet: str
+        fragment of review text with highlighted matches
+    """
+    snippet = SnippetField(source='search_snippet')
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ('id', 'title', 'text', 'author', 'score', 'pub_date',
+                  'snippet')
 
-class CommmentSerializer(serializers.ModelSerializer):
+
+class CommmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for a Comment model
     ...
@@ -257,8 +285,7 @@ class CommmentSerializer(serializers.ModelSerializer):
     """
     author = serializers.SlugRelatedField(
         read_only=True, slug_field='username')
-    review = serializers.SlugRelatedField(
-        read_only=True, slug_field='id')
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         fields = '__all__'
@@ -299,7 +326,7 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for GET or RETRIEVE methods on Title model
     ...
@@ -309,30 +336,108 @@ class TitleReadSerializer(serializers.ModelSerializer):
         link to genre's serializer
     category: Category
         link to category's serializer
-    rating: int
-        average rating of a title
-
-    Methods
-    -------
-    get_rating():
-        gather all scores from all reviews for this title
-        and calculate average
+    rating: float
+        average rating of a title, stored on the title itself
     """
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
-    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'description', 'year',
                   'rating', 'genre', 'category')
 
-    def get_rating(self, obj):
-        review_list = Review.objects.filter(title__id=obj.id)
-        if len(review_list) != 0:
-            score_list = [i.score for i in review_list]
-            return sum(score_list) / len(score_list)
-        return None
+
+class TitleSearchSerializer(TitleReadSerializer):
+    """
+    Serializer for titles found by a full-text query
+    ...
+    Attributes
+    ----------
+    snippet: str
+        fragment of name or description with highlighted matches
+    """
+    snippet = SnippetField(source='search_snippet')
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + ('snippet',)
+
+
+def get_title_scores(title):
+    # у произведения без отзывов строки счетчиков еще нет
+    try:
+        histogram = title.score_histogram
+    except ScoreHistogram.DoesNotExist:
+        histogram = ScoreHistogram(title=title)
+    return histogram.as_dict()
+
+
+class TitleScoresSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a distribution of review scores of a title
+    ...
+    Attributes
+    ----------
+    id: int
+        id of a title
+    scores: dict
+        number of reviews for every possible score
+
+    Methods
+    -------
+    get_scores():
+        read score counters of a title
+    """
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'scores')
+
+    def get_scores(self, obj):
+        return get_title_scores(obj)
+
+
+class TitleDetailSerializer(TitleReadSerializer):
+    """
+    Serializer for RETRIEVE method on Title model
+    ...
+    Attributes
+    ----------
+    scores: dict
+        number of reviews for every possible score
+    """
+    scores = serializers.SerializerMethodField()
+
+    class Meta(TitleReadSerializer.Meta):
+        fields = TitleReadSerializer.Meta.fields + ('scores',)
+
+    def get_scores(self, obj):
+        return get_title_scores(obj)
+
+
+class TitleRankingSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a TitleRanking model
+    ...
+    Attributes
+    ----------
+    weighted_rating: float
+        bayesian average of scores of a title
+
+    Methods
+    -------
+    to_representation():
+        represent a ranked title as a title with its weighted rating
+    """
+    class Meta:
+        model = TitleRanking
+        fields = ('weighted_rating',)
+
+    def to_representation(self, instance):
+        data = TitleReadSerializer(instance.title, context=self.context).data
+        data['weighted_rating'] = instance.weighted_rating
+        return data
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
@@ -367,3 +472,85 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         model = Title
         fields = ('id', 'name', 'description', 'year',
                   'rating', 'genre', 'category')
+        read_only_fields = ('rating',)
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """
+    Serializer to validate one title of a bulk request.
+    Genres and category are kept as slugs: they are resolved
+    for the whole batch at once, not for every title.
+    An item with id updates an existing title, other fields
+    of such an item are optional.
+    ...
+    Attributes
+    ----------
+    id: int
+        id of a title to update, absent for a new title
+    genre: list
+        slugs of genres of a title
+    category: str
+        slug of a category of a title
+    """
+    id = serializers.IntegerField(required=False, min_value=1)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'description', 'year', 'genre', 'category')
+
+
+class ModerationDeleteSerializer(serializers.Serializer):
+    """
+    Serializer to validate a bulk moderation delete request.
+    Reviews and comments are chosen by ids, by an author
+    or by an author since a date, the sets are joined.
+    ...
+    Attributes
+    ----------
+    reviews: list
+        ids of reviews to delete with all their comments
+    comments: list
+        ids of comments to delete
+    author: str
+        username of an author whose reviews and comments are deleted
+    since: datetime
+        only reviews and comments of the author published since then
+
+    Methods
+    -------
+    get_querysets():
+        return querysets of reviews and comments to delete
+    """
+    reviews = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False,
+        max_length=settings.BULK_DELETE_MAX_IDS)
+    comments = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False,
+        max_length=settings.BULK_DELETE_MAX_IDS)
+    author = serializers.SlugRelatedField(
+        slug_field='username', queryset=User.objects.all(), required=False)
+    since = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        if not (data.get('reviews') or data.get('comments')
+                or 'author' in data):
+            raise serializers.ValidationError(
+                'Укажите id отзывов и комментариев или автора.')
+        if 'since' in data and 'author' not in data:
+            raise serializers.ValidationError(
+                {'since': 'Дата указывается вместе с автором.'})
+        return data
+
+    def get_querysets(self):
+        querysets = []
+        for model, field in ((Review, 'reviews'), (Comment, 'comments')):
+            query = Q(id__in=self.validated_data.get(field, ()))
+            if 'author' in self.validated_data:
+                by_author = Q(author=self.validated_data['author'])
+                if 'since' in self.validated_data:
+                    by_author &= Q(pub_date__gte=self.validated_data['since'])
+                query |= by_author
+            querysets.append(model.objects.filter(query))
+        return querysets
@@ -1,15 +1,14 @@
-
 import uuid
 
-from django.core.mail import send_mail
+from users.outbox import enqueue_email
 
 
 def send_confirmation_email(email, confirmation_code):
+    # письмо только ставится в очередь, отправляет его send_emails
     subject = 'Confirmation Code'
     message = f'Ваш код для получения токена: {confirmation_code}'
     sender = 'mr.iskhakov.r@yandex.ru'
-    recipient_list = [email]
-    send_mail(subject, message, sender, recipient_list)
+    enqueue_email(email, subject, message, sender)
 
 
 def generate_confirmation_code(length=20):
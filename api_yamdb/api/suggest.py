@@ -0,0 +1,178 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from reviews.models import Title
+from reviews.signals import scores_changed
+
+from .cache import get_generation
+
+LAST_CHAR = chr(0x10FFFF)
+
+
+def fold(text):
+    return text.casefold().replace('ё', 'е')
+
+
+class PrefixIndex:
+    """
+    In-memory index for autocomplete of title names.
+    Keys are folded suffixes of a name starting at each word,
+    kept in a sorted list, so the keys with a given prefix are
+    a contiguous range found with bisect. Candidates from the range
+    are ranked by popularity: number of reviews, then rating.
+    Answers are memoized until the next change of the index.
+    The index is built from the titles table for a catalog generation
+    and rebuilt once the generation changes, as the catalog engine does,
+    so changes made by other processes are seen too. Changes committed
+    by this process are applied in place when the generation moved
+    by at most one step since the index was last in sync.
+    ...
+    Methods
+    -------
+    suggest(prefix, limit):
+        return up to limit most popular titles matching a prefix
+    add(title), remove(title_id):
+        put a title into the index or take it out
+    shift_popularity(title_id, score_delta, count_delta):
+        update ranking data of a title after a review change
+    reset():
+        drop the index, it is rebuilt on next use
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.generation = None
+        self.keys = None
+        self.titles = {}
+        self.results = {}
+
+    def build(self, generation):
+        keys, titles = [], {}
+        for title_id, name, reviews_count, score_sum in (
+                Title.objects.order_by().values_list(
+                    'id', 'name', 'reviews_count', 'score_sum')):
+            titles[title_id] = [name, reviews_count, score_sum]
+            keys.extend((key, title_id) for key in self.get_keys(name))
+        keys.sort()
+        self.keys, self.titles, self.results = keys, titles, {}
+        self.generation = generation
+
+    @staticmethod
+    def get_keys(name):
+        folded = fold(name)
+        return {folded[match.start():]
+                for match in re.finditer(r'\w+', folded)}
+
+    def ensure_built(self):
+        # поколение читается до чтения таблицы: изменение во время
+        # сборки даст новое поколение и еще одну сборку
+        generation = get_generation()
+        if self.keys is None or generation != self.generation:
+            with self.lock:
+                if self.keys is None or generation != self.generation:
+                    self.build(generation)
+
+    def in_sync(self):
+        # Изменение, зафиксированное этим процессом, сдвигает поколение
+        # на один шаг. Больший сдвиг значит, что каталог меняли и другие
+        # процессы: индекс сбрасывается и собирается заново.
+        if self.keys is None:
+            return False
+        generation = get_generation()
+        if generation - self.generation not in (0, 1):
+            self.reset()
+            return False
+        self.generation = generation
+        return True
+
+    def suggest(self, prefix, limit):
+        prefix = fold(prefix.strip())
+        if not prefix:
+            return []
+        self.ensure_built()
+        with self.lock:
+            cached = self.results.get((prefix, limit))
+            if cached is not None:
+                return cached
+            start = bisect_left(self.keys, (prefix,))
+            end = bisect_left(self.keys, (prefix + LAST_CHAR,), start)
+            candidates = {title_id for _, title_id in self.keys[start:end]}
+            best = heapq.nlargest(limit, candidates, key=self.popularity)
+            result = [{'id': title_id, 'name': self.titles[title_id][0]}
+                      for title_id in best]
+            self.results[(prefix, limit)] = result
+            return result
+
+    def popularity(self, title_id):
+        _, reviews_count, score_sum = self.titles[title_id]
+        rating = score_sum / reviews_count if reviews_count else 0
+        return reviews_count, rating, title_id
+
+    def add(self, title):
+        with self.lock:
+            if not self.in_sync():
+                return
+            self.remove(title.id)
+            self.results = {}
+            self.titles[title.id] = [
+                title.name, title.reviews_count, title.score_sum]
+            for key in self.get_keys(title.name):
+                insort(self.keys, (key, title.id))
+
+    def remove(self, title_id):
+        with self.lock:
+            if not self.in_sync() or title_id not in self.titles:
+                return
+            self.results = {}
+            name = self.titles.pop(title_id)[0]
+            for key in self.get_keys(name):
+                index = bisect_left(self.keys, (key, title_id))
+                if (index < len(self.keys)
+                        and self.keys[index] == (key, title_id)):
+                    del self.keys[index]
+
+    def shift_popularity(self, title_id, score_delta, count_delta):
+        with self.lock:
+            if not self.in_sync() or title_id not in self.titles:
+                return
+            self.results = {}
+            self.titles[title_id][1] += count_delta
+            self.titles[title_id][2] += score_delta
+
+    def reset(self):
+        with self.lock:
+            self.generation = None
+            self.keys = None
+            self.titles = {}
+            self.results = {}
+
+
+title_index = PrefixIndex()
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: title_index.add(instance))
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    title_id = instance.id
+    transaction.on_commit(lambda: title_index.remove(title_id))
+
+
+@receiver(scores_changed)
+def title_scores_changed(sender, title_id, score_delta, count_delta,
+                         **kwargs):
+    transaction.on_commit(lambda: title_index.shift_popularity(
+        title_id, score_delta, count_delta))
+
+
+@receiver(post_migrate)
+def database_flushed(sender, **kwargs):
+    title_index.reset()
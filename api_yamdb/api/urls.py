@@ -1,9 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, CustomTokenObtainPairView,
-                    GenreViewSet, ReviewViewSet, TitleViewSet, UsersViewSet,
-                    UserUpdateProfileAPIView, UserViewSet)
+from .views import (AuthorCommentsView, AuthorReviewsView, CategoryViewSet,
+                    CommentViewSet, CustomTokenObtainPairView,
+                    GenreViewSet, ModerationDeleteView,
+                    ReviewSearchView, ReviewViewSet,
+                    TitleViewSet, UsersViewSet, UserUpdateProfileAPIView,
+                    UserViewSet)
 
 
 router_v1 = DefaultRouter()
@@ -31,6 +34,19 @@ urlpatterns = [
     path('v1/users/me/',
          UserUpdateProfileAPIView.as_view(),
          name='user-update-profile'),
+    path('v1/reviews/search/',
+         ReviewSearchView.as_view(),
+         name='review-search'),
+    path('v1/users/<str:username>/reviews/',
+         AuthorReviewsView.as_view(),
+         name='author-reviews'),
+    path('v1/users/<str:username>/comments/',
+         AuthorCommentsView.as_view(),
+         name='author-comments'),
+
+    path('v1/moderation/delete/',
+         ModerationDeleteView.as_view(),
+         name='moderation-delete'),
 
     path('v1/', include(router_v1.urls)),
 ]
@@ -1,23 +1,56 @@
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status, viewsets
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework import filters
 
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (Category, Comment, Genre, Review, Title,
+                            TitleRanking)
 from users.models import User
 
-from .permissions import IsAdmin, IsAdminOrReadOnly, ReviewCommentPermissions
+from .permissions import (IsAdmin, IsAdminOrReadOnly, IsModerator,
+                          ReviewCommentPermissions)
 from .serializers import (CategorySerializer, CommmentSerializer,
-                          GenreSerializer, ReviewSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
+                          GenreSerializer, ModerationDeleteSerializer,
+                          ReviewSearchSerializer,
+                          ReviewSerializer,
+                          TitleBulkSerializer,
+                          TitleDetailSerializer, TitleRankingSerializer,
+                          TitleReadSerializer, TitleScoresSerializer,
+                          TitleSearchSerializer,
+                          TitleWriteSerializer,
                           UserSerializer, UsersSerializer, UserTokenSerializer,
                           UserUpdateProfileSerializer)
-from .viewsets import ListCreateDestroyViewSet
+from .bulk import TitleBulkLoader
+from .cache import CatalogCacheMixin
+from .catalog import catalog_engine
+from .embed import (TitleEmbedSerializer, embed_comments, parse_embed,
+                    parse_include_comments)
+from .conditional import ConditionalGetMixin, ConditionalListMixin
+from .fast import FastListMixin
+from .viewsets import (ListCreateDestroyViewSet, NestedParentMixin,
+                       SparseFieldsViewMixin)
 from .filter_fields import TitleFilter
+from .moderation import ModerationDeleter
+from .pagination import (CountedPageNumberPagination,
+                         PubDateCursorPagination, PubDatePagination,
+                         TitlePagination)
+from .parsers import NDJSONParser
+from .search import full_text_search
+from .suggest import title_index
+
+TOP_LIMIT = 10
+TOP_MAX_LIMIT = 100
+SCORES_MAX_IDS = 100
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 20
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -66,62 +99,370 @@ class UsersViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'patch', 'delete']
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, FastListMixin, NestedParentMixin,
+                    SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (ReviewCommentPermissions,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = PubDatePagination
+    parent_model = Title
+    parent_lookups = {'id': 'title_id'}
+    sparse_select = {'author': 'author'}
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.trim_queryset(
+            self.get_parent().reviews.select_related('author'))
+
+    def get_known_count(self):
+        # число отзывов хранится в строке произведения
+        return self.get_parent().reviews_count
+
+    def get_include_comments(self):
+        if not hasattr(self, 'include_comments'):
+            self.include_comments = None
+            if self.action == 'list':
+                self.include_comments = parse_include_comments(
+                    self.request.query_params.get('include_comments'))
+        return self.include_comments
+
+    def get_validated_queryset(self):
+        queryset = super().get_validated_queryset()
+        if not self.get_include_comments():
+            return queryset
+        # правка комментария не меняет строку отзыва
+        return [queryset, Comment.objects.filter(
+            review__title_id=self.kwargs['title_id'])]
+
+    def get_paginated_response(self, data):
+        limit = self.get_include_comments()
+        if limit:
+            data = embed_comments(data, limit)
+        return super().get_paginated_response(data)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        title = self.get_parent()
+        # второй отзыв не дает записать ограничение уникальности,
+        # без предварительной проверки и без гонки между запросами.
+        # Рейтинг произведения пересчитывают сигналы отзыва
+        # в той же транзакции
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not Review.objects.filter(
+                    title=title, author=self.request.user).exists():
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Вы уже написали свой отзыв!']})
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+
+class ReviewSearchView(generics.ListAPIView):
+    '''Полнотекстовый поиск по отзывам'''
+    serializer_class = ReviewSearchSerializer
+    permission_classes = (AllowAny,)
+    # число найденных отзывов кэшируется до смены поколения каталога
+    pagination_class = CountedPageNumberPagination
+
+    def get_queryset(self):
+        reviews = Review.objects.select_related('author')
+        title_id = self.request.query_params.get('title')
+        if title_id and title_id.isdigit():
+            reviews = reviews.filter(title_id=title_id)
+        return full_text_search(
+            reviews, self.request.query_params.get('search', ''), ('text',))
+
+
+class AuthorReviewsView(NestedParentMixin, generics.ListAPIView):
+    '''Все отзывы пользователя, новые первыми.
+
+    Страницы по курсору (pub_date, id) - диапазон по индексу
+    (author, pub_date), глубина страницы не влияет на запрос.
+    '''
+    serializer_class = ReviewSerializer
+    permission_classes = (AllowAny,)
+    pagination_class = PubDateCursorPagination
+    parent_model = User
+    parent_lookups = {'username': 'username'}
+
+    def get_queryset(self):
+        return self.get_parent().reviews.select_related('author')
+
+
+class AuthorCommentsView(AuthorReviewsView):
+    '''Все комментарии пользователя, новые первыми'''
+    serializer_class = CommmentSerializer
+
+    def get_queryset(self):
+        return self.get_parent().comments.select_related('author')
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class ModerationDeleteView(generics.GenericAPIView):
+    '''Удаление модератором многих отзывов и комментариев сразу.
+
+    Принимает id отзывов и комментариев и/или автора с датой since.
+    Отзывы удаляются вместе с комментариями. Строки удаляются
+    пачками по BULK_DELETE_CHUNK_SIZE, рейтинги произведений
+    и счетчики комментариев пересчитываются один раз на пачку.
+    В ответе число удаленных отзывов и комментариев.
+    '''
+    serializer_class = ModerationDeleteSerializer
+    permission_classes = (IsModerator,)
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reviews, comments = serializer.get_querysets()
+        deleted = ModerationDeleter(settings.BULK_DELETE_CHUNK_SIZE).delete(
+            reviews, comments)
+        return Response(deleted)
+
+
+class CommentViewSet(ConditionalGetMixin, FastListMixin, NestedParentMixin,
+                     SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = CommmentSerializer
     permission_classes = (ReviewCommentPermissions,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = PubDatePagination
+    # отзыв ищется сразу по своему id и id произведения из адреса
+    parent_model = Review
+    parent_lookups = {'id': 'review_id', 'title_id': 'title_id'}
+    sparse_select = {'author': 'author'}
 
     def get_queryset(self):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        return review.comments.all()
+        return self.trim_queryset(
+            self.get_parent().comments.select_related('author'))
+
+    def get_known_count(self):
+        # число комментариев хранится в строке отзыва
+        return self.get_parent().comments_count
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id, title=title_id)
-        serializer.save(author=self.request.user, review=review)
+        # счетчик комментариев отзыва меняют сигналы комментария
+        with transaction.atomic():
+            serializer.save(
+                author=self.request.user, review=self.get_parent())
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(ConditionalListMixin, FastListMixin,
+                      ListCreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    pagination_class = CountedPageNumberPagination
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(ConditionalListMixin, FastListMixin,
+                   ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    pagination_class = CountedPageNumberPagination
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(ConditionalGetMixin, CatalogCacheMixin, FastListMixin,
+                   SparseFieldsViewMixin, viewsets.ModelViewSet):
+    '''Произведения.
+
+    Бюджет SQL-запросов не зависит от размера страницы:
+    list - 3 запроса (валидаторы с числом строк для пагинации,
+    произведения с категорией, жанры страницы), retrieve - 3 запроса
+    (валидаторы, произведение с категорией и распределением оценок,
+    его жанры).
+    На условный запрос с актуальным ETag (у retrieve и Last-Modified)
+    ответ 304 дается после одного запроса валидаторов.
+    ?embed=reviews[:N],comments[:M] добавляет к retrieve первые отзывы
+    и первые комментарии к каждому: еще по одному запросу на отзывы
+    и на комментарии (ROW_NUMBER() по отзывам) и по запросу валидаторов.
+    Рейтинг хранится в строке произведения и читается тем же запросом.
+    Ответы list и retrieve кэшируются до изменения каталога.
+    ?fields= и ?exclude= сокращают ответ, а вместе с ним и SQL:
+    невыбранные столбцы откладываются, лишние JOIN и prefetch не делаются.
+    С CATALOG_ENGINE_ENABLED фильтры list без SQL отвечает снимок
+    каталога в памяти, из базы читается только страница: 2 запроса.
+    Страница list собирается из строк values_list() без сериализатора
+    (FAST_READ_PATH), ответ тот же.
+    '''
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
     http_method_names = ['get', 'post', 'head', 'patch', 'delete']
+    sparse_select = {'category': 'category', 'scores': 'score_histogram'}
+    sparse_prefetch = {'genre': 'genre'}
+    # вложенные комментарии не меняют поколение каталога
+    uncached_params = ('embed',)
 
-    def get_serializer_class(self):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('retrieve', 'scores'):
+            queryset = queryset.select_related('score_histogram')
         if self.action in ('list', 'retrieve'):
+            queryset = self.trim_queryset(queryset)
+        return queryset
+
+    def filter_queryset(self, queryset):
+        if self.action == 'list' and settings.CATALOG_ENGINE_ENABLED:
+            titles = catalog_engine.filter_titles(
+                self.request.query_params, queryset)
+            if titles is not None:
+                return titles
+        return super().filter_queryset(queryset)
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            if self.request.query_params.get('search'):
+                return TitleSearchSerializer
             return TitleReadSerializer
+        if self.action == 'retrieve':
+            if self.get_embed():
+                return TitleEmbedSerializer
+            return TitleDetailSerializer
+        if self.action == 'top':
+            return TitleRankingSerializer
+        if self.action == 'scores':
+            return TitleScoresSerializer
+        if self.action == 'bulk':
+            return TitleBulkSerializer
         return TitleWriteSerializer
+
+    def get_embed(self):
+        if not hasattr(self, 'embed'):
+            self.embed = {}
+            if self.action == 'retrieve':
+                self.embed = parse_embed(
+                    self.request.query_params.get('embed', ''))
+        return self.embed
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['embed'] = self.get_embed()
+        return context
+
+    def get_required_columns(self):
+        # TitleEmbedSerializer отдает число отзывов при любом ?fields=
+        if self.get_embed():
+            return ('reviews_count',)
+        return ()
+
+    def get_validated_queryset(self):
+        queryset = super().get_validated_queryset()
+        embed = self.get_embed()
+        if not embed:
+            return queryset
+        title_id = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        querysets = [queryset, Review.objects.filter(title_id=title_id)]
+        if 'comments' in embed:
+            querysets.append(
+                Comment.objects.filter(review__title_id=title_id))
+        return querysets
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            title = serializer.save()
+            TitleRanking.objects.refresh([title.id])
+
+    @action(detail=False)
+    def top(self, request):
+        '''Лучшие произведения, в целом или в жанре и категории'''
+        rankings = TitleRanking.objects.select_related(
+            'title__category').prefetch_related('title__genre')
+        genre = request.query_params.get('genre')
+        category = request.query_params.get('category')
+        if genre:
+            rankings = rankings.filter(genre__slug=genre)
+            if category:
+                rankings = rankings.filter(title__category__slug=category)
+        elif category:
+            rankings = rankings.filter(
+                genre__isnull=True, category__slug=category)
+        else:
+            rankings = rankings.filter(
+                genre__isnull=True, category__isnull=True)
+        try:
+            limit = int(request.query_params.get('limit', TOP_LIMIT))
+        except ValueError:
+            limit = TOP_LIMIT
+        limit = max(1, min(limit, TOP_MAX_LIMIT))
+        serializer = self.get_serializer(rankings[:limit], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False)
+    def suggest(self, request):
+        '''Подсказки названий произведений по началу слова'''
+        try:
+            limit = int(request.query_params.get('limit', SUGGEST_LIMIT))
+        except ValueError:
+            limit = SUGGEST_LIMIT
+        limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+        return Response(
+            title_index.suggest(request.query_params.get('q', ''), limit))
+
+    @action(detail=False)
+    def scores(self, request):
+        '''Распределения оценок для нескольких произведений'''
+        ids = request.query_params.get('ids', '').split(',')
+        try:
+            ids = {int(title_id) for title_id in ids if title_id}
+        except ValueError:
+            raise ValidationError(
+                {'ids': 'Ожидается список id через запятую.'})
+        if len(ids) > SCORES_MAX_IDS:
+            raise ValidationError(
+                {'ids': f'Не больше {SCORES_MAX_IDS} произведений за запрос.'})
+        titles = Title.objects.filter(id__in=ids).select_related(
+            'score_histogram').only('id', 'score_histogram').order_by('id')
+        serializer = self.get_serializer(titles, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post'],
+            parser_classes=(JSONParser, NDJSONParser))
+    def bulk(self, request):
+        '''Создание и изменение произведений пачкой.
+
+        Принимает JSON-массив или NDJSON. Элемент с id изменяет
+        существующее произведение. По умолчанию пачка пишется одной
+        транзакцией и только если все элементы верны, иначе ответ 400.
+        С ?atomic=false каждые chunk_size элементов пишутся отдельной
+        транзакцией, неверные элементы пропускаются.
+        В ответе results и errors по элементам в порядке запроса.
+        '''
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {'non_field_errors': ['Ожидается список произведений.']})
+        if len(items) > settings.BULK_TITLES_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {settings.BULK_TITLES_MAX_ITEMS} '
+                'произведений за запрос.']})
+        try:
+            chunk_size = int(request.query_params.get(
+                'chunk_size', settings.BULK_TITLES_CHUNK_SIZE))
+        except ValueError:
+            chunk_size = settings.BULK_TITLES_CHUNK_SIZE
+        chunk_size = max(1, min(chunk_size, settings.BULK_TITLES_MAX_ITEMS))
+        atomic = request.query_params.get('atomic', 'true').lower() not in (
+            'false', '0')
+        results, errors = TitleBulkLoader(chunk_size).load(items, atomic)
+        if results is None:
+            return Response(
+                {'results': [None] * len(items), 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': results, 'errors': errors})
@@ -1,3 +1,5 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.shortcuts import get_object_or_404
 from rest_framework import mixins, viewsets
 
 
@@ -6,3 +8,81 @@ class ListCreateDestroyViewSet(mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
     pass
+
+
+class SparseFieldsViewMixin:
+    """
+    Mixin for a viewset to load only the columns and relations
+    needed by the fields left in a serializer by ?fields= and ?exclude=.
+    ...
+    Attributes
+    ----------
+    sparse_select: dict
+        serializer field to a relation loaded with select_related
+    sparse_prefetch: dict
+        serializer field to a relation loaded with prefetch_related
+
+    Methods
+    -------
+    trim_queryset(queryset):
+        defer unused columns, drop unused joins and prefetches
+    get_required_columns():
+        return columns the view reads itself, outside serializer fields
+    """
+    sparse_select = {}
+    sparse_prefetch = {}
+
+    def get_required_columns(self):
+        return ()
+
+    def trim_queryset(self, queryset):
+        params = self.request.query_params
+        if self.request.method != 'GET' or not (
+                params.get('fields') or params.get('exclude')):
+            return queryset
+        model = queryset.model
+        columns = {'id', *self.get_required_columns()}
+        select, prefetch = [], []
+        for name, field in self.get_serializer().fields.items():
+            if name in self.sparse_prefetch:
+                prefetch.append(self.sparse_prefetch[name])
+                continue
+            if name in self.sparse_select:
+                select.append(self.sparse_select[name])
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete:
+                columns.add(model_field.name)
+        return queryset.select_related(None).prefetch_related(None).only(
+            *columns).select_related(*select).prefetch_related(*prefetch)
+
+
+class NestedParentMixin:
+    """
+    Mixin for a viewset nested under other objects in the url
+    to resolve the whole chain of url kwargs with one query.
+    The parent is looked up once and kept for the rest of the request.
+    ...
+    Attributes
+    ----------
+    parent_model: Model
+        model of the object the viewset is nested under
+    parent_lookups: dict
+        parent model field to the url kwarg it must be equal to
+
+    Methods
+    -------
+    get_parent():
+        return the parent or raise 404 if the chain does not match
+    """
+    parent_model = None
+    parent_lookups = {}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(self.parent_model, **{
+                field: self.kwargs.get(kwarg)
+                for field, kwarg in self.parent_lookups.items()})
+        return self._parent
@@ -0,0 +1,40 @@
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+ROW_NUMBER = 'window_row_number'
+
+
+def get_order_by(queryset):
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    expressions = []
+    for name in list(ordering) + ['-pk']:
+        if name.startswith('-'):
+            expressions.append(F(name[1:]).desc())
+        else:
+            expressions.append(F(name).asc())
+    return expressions
+
+
+def top_n_per_group(queryset, group_field, limit):
+    """
+    Return a queryset of the first limit rows of every group
+    of rows with the same group_field, in the queryset ordering
+    with pk as a tiebreaker. Rows are numbered with ROW_NUMBER()
+    OVER (PARTITION BY group_field) in a single query. Django 3.2 can not
+    filter on a window function, so the numbered query is wrapped
+    into a raw subquery selecting ids of the first rows.
+    """
+    order_by = get_order_by(queryset)
+    numbered = queryset.order_by().annotate(**{ROW_NUMBER: Window(
+        RowNumber(), partition_by=[F(group_field)], order_by=order_by,
+    )}).values('pk', ROW_NUMBER)
+    connection = connections[queryset.db]
+    sql, params = numbered.query.sql_with_params()
+    quote = connection.ops.quote_name
+    ids = RawSQL(
+        f'SELECT {quote(queryset.model._meta.pk.column)} FROM ({sql}) '
+        f'AS numbered WHERE {quote(ROW_NUMBER)} <= %s',
+        (*params, limit))
+    return queryset.filter(pk__in=ids).order_by(*order_by)
@@ -71,10 +71,86 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # тестовая база в файле: общая база SQLite в памяти сразу
+        # отвечает table is locked и не подходит для запросов из потоков
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+# Кэш общий для всех воркеров: поколение каталога и кэшированные ответы
+# видны каждому процессу. LocMemCache для этого не подходит,
+# под нагрузкой файлы можно заменить на Memcached или Redis.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 60 * 5
+
+
+# Catalog engine
+# Фильтрация списка произведений по снимку каталога в памяти, без SQL.
+# Снимок пересобирается в CATALOG_SNAPSHOT_DIR после изменения каталога
+# и отображается в память всеми процессами сервера.
+# Нужен кэш CATALOG_CACHE_ALIAS, общий для всех процессов.
+
+CATALOG_ENGINE_ENABLED = False
+CATALOG_SNAPSHOT_DIR = BASE_DIR / 'catalog'
+
+
+# Rankings
+# Число отзывов, с весом которых средняя оценка всех произведений
+# входит во взвешенный рейтинг каждого произведения. Сама средняя
+# хранится и пересчитывается только командой refresh_rankings,
+# а пока во всем каталоге меньше RANKING_MIN_REVIEWS отзывов -
+# считается заново при каждом обновлении рейтингов.
+
+RANKING_MIN_REVIEWS = 3
+
+
+# Fast read path
+# Списки произведений, категорий, жанров, отзывов и комментариев
+# собираются из строк values_list() без сериализаторов DRF.
+# Ответ совпадает с ответом сериализатора байт в байт.
+
+FAST_READ_PATH = True
+
+
+# Bulk titles
+# Пакетная загрузка произведений: наибольшее число произведений
+# в запросе и размер пачки строк в одном INSERT или UPDATE
+# (без atomic - и в одной транзакции).
+
+BULK_TITLES_MAX_ITEMS = 10000
+BULK_TITLES_CHUNK_SIZE = 500
+
+
+# Bulk delete
+# Пакетное удаление отзывов и комментариев модератором: наибольшее
+# число id каждого вида в запросе и размер пачки строк в одном DELETE.
+# Рейтинги и счетчики пересчитываются один раз на пачку.
+
+BULK_DELETE_MAX_IDS = 10000
+BULK_DELETE_CHUNK_SIZE = 500
+
+
+# Pagination counts
+# Число строк в списке считается не дальше PAGINATION_COUNT_CAP,
+# больше - отдается оценка с approximate: true. Посчитанное число
+# хранится в кэше PAGINATION_COUNT_TIMEOUT секунд до смены поколения
+# каталога, поэтому такая пагинация стоит только на списках каталога,
+# отзывов и комментариев, остальные списки считаются DRF как обычно.
+
+PAGINATION_COUNT_CAP = 10000
+PAGINATION_COUNT_TIMEOUT = 30
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -136,5 +212,22 @@ SIMPLE_JWT = {
 }
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'users.mail.RollingFileEmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+
+# Email outbox
+# Запрос только записывает письмо в очередь, команда send_emails
+# отправляет его пачками по EMAIL_OUTBOX_BATCH_SIZE через одно
+# соединение. Неотправленное письмо повторяется через
+# EMAIL_OUTBOX_RETRY_DELAY секунд, каждый раз вдвое позже,
+# но не больше EMAIL_OUTBOX_MAX_ATTEMPTS раз.
+# Пачка занимается до отправки на EMAIL_OUTBOX_CLAIM_TIMEOUT секунд:
+# параллельные send_emails ее не берут, а письма упавшего процесса
+# снова становятся в очередь после этого срока.
+
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_CLAIM_TIMEOUT = 10 * 60
+EMAIL_OUTBOX_POLL_INTERVAL = 5
@@ -1,9 +1,13 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (Category, Comment, Genre, RankingPrior, Review,
+                     ScoreHistogram, Title, TitleRanking)
 
 admin.site.register(Category)
 admin.site.register(Genre)
 admin.site.register(Title)
 admin.site.register(Review)
 admin.site.register(Comment)
+admin.site.register(TitleRanking)
+admin.site.register(RankingPrior)
+admin.site.register(ScoreHistogram)
@@ -0,0 +1,62 @@
+# Внешние FTS5-индексы над названием и описанием произведений
+# и текстом отзывов. unicode61 приводит к нижнему регистру любые
+# буквы Unicode, в том числе кириллицу, и снимает диакритику
+# у латиницы.
+# Индексы обновляются триггерами при любой записи в исходные таблицы.
+FTS_TABLES = (
+    ('reviews_title', ('name', 'description')),
+    ('reviews_review', ('text',)),
+)
+
+
+def create_statements(table, columns):
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    return (
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, "
+        f"content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+
+
+def drop_statements(table, columns):
+    fts = f'{table}_fts'
+    return (
+        f'DROP TRIGGER IF EXISTS {fts}_ai',
+        f'DROP TRIGGER IF EXISTS {fts}_ad',
+        f'DROP TRIGGER IF EXISTS {fts}_au',
+        f'DROP TABLE IF EXISTS {fts}',
+    )
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for table, columns in FTS_TABLES:
+            for statement in statements(table, columns):
+                schema_editor.execute(statement)
+    return operation
+
+
+def recreate_statements(table, columns):
+    # SQLite пересоздает таблицу при многих изменениях схемы
+    # и теряет при этом триггеры, индекс нужно собрать заново
+    return drop_statements(table, columns) + create_statements(
+        table, columns)
+
+
+def noop(apps, schema_editor):
+    pass
@@ -0,0 +1,41 @@
+# Generated by Django 3.2 on 2026-10-18 04:28
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Sum
+
+
+def fill_rating(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    for title in Title.objects.annotate(
+            total=Sum('reviews__score'), count=Count('reviews'),
+            average=Avg('reviews__score')):
+        title.score_sum = title.total or 0
+        title.reviews_count = title.count
+        title.rating = title.average
+        title.save(update_fields=['score_sum', 'reviews_count', 'rating'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_alter_title_year'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='reviews_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Рейтинг произведения'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.2 on 2026-10-18 04:33
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    prior = Title.objects.aggregate(
+        score_sum=Sum('score_sum'), reviews_count=Sum('reviews_count'))
+    if not prior['reviews_count']:
+        return
+    prior_mean = prior['score_sum'] / prior['reviews_count']
+    weight = settings.RANKING_MIN_REVIEWS
+    rows = []
+    for title in Title.objects.filter(
+            reviews_count__gt=0).prefetch_related('genre'):
+        weighted_rating = (
+            (title.score_sum + weight * prior_mean)
+            / (title.reviews_count + weight))
+        rows.append(TitleRanking(
+            title=title, weighted_rating=weighted_rating))
+        rows.extend(
+            TitleRanking(title=title, genre=genre,
+                         weighted_rating=weighted_rating)
+            for genre in title.genre.all())
+        if title.category_id is not None:
+            rows.append(TitleRanking(
+                title=title, category_id=title.category_id,
+                weighted_rating=weighted_rating))
+    TitleRanking.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weighted_rating', models.FloatField(verbose_name='Взвешенный рейтинг')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.category', verbose_name='Категория')),
+                ('genre', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.genre', verbose_name='Жанр')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Рейтинги произведений',
+                'ordering': ['-weighted_rating', '-title_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['genre', 'category', '-weighted_rating'], name='ranking_scope_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations
+
+from reviews.fts import create_statements, drop_statements, run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_score_histogram'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run(create_statements), run(drop_statements)),
+    ]
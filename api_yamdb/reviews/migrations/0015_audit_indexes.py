@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 05:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_author_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='titleranking',
+            name='ranking_scope_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', '-rating'], name='title_year_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['genre', 'category', '-weighted_rating', '-title'], name='ranking_scope_order_idx'),
+        ),
+    ]
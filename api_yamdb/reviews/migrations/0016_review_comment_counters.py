@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 05:20
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+from reviews.fts import noop, recreate_statements, run
+
+
+def fill_counters(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    for review in Review.objects.annotate(
+            count=Count('comments'), last=Max('comments__pub_date')):
+        review.comments_count = review.count
+        review.last_comment_at = review.last
+        review.save(update_fields=['comments_count', 'last_comment_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_audit_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(noop, run(recreate_statements)),
+        migrations.AddField(
+            model_name='review',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество комментариев'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего комментария'),
+        ),
+        migrations.RunPython(run(recreate_statements), noop),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0017_ranking_prior'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='title',
+            options={'ordering': ['-rating', '-id'], 'verbose_name': 'Произведение', 'verbose_name_plural': 'Произведения'},
+        ),
+        migrations.RemoveIndex(
+            model_name='title',
+            name='title_year_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', '-rating', '-id'], name='title_year_rating_id_idx'),
+        ),
+    ]
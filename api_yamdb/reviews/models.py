@@ -1,7 +1,12 @@
 import os
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (Avg, Count, ExpressionWrapper, F, FloatField,
+                              OuterRef, Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 
 from dotenv import load_dotenv
 
@@ -13,6 +18,9 @@ User = get_user_model()
 
 NAME_LEN = int(os.getenv('NAME_LEN'))
 SLUG_LEN = int(os.getenv('SLUG_LEN'))
+MIN_SCORE = 1
+MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
 
 
 class Category(models.Model):
@@ -26,6 +34,8 @@ class Category(models.Model):
         name of a category
     slug: str
         slug of a category
+    updated_at: DateTime
+        date of the last change of a category
 
     Methods
     -------
@@ -37,6 +47,9 @@ class Category(models.Model):
         verbose_name='Название категории',
     )
     slug = models.SlugField(max_length=SLUG_LEN, unique=True)
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True,
+        verbose_name='Дата изменения')
 
     def __str__(self):
         return f'{self.slug}'
@@ -58,6 +71,8 @@ class Genre(models.Model):
         name of a genre
     slug: str
         slug of a genre
+    updated_at: DateTime
+        date of the last change of a genre
 
     Methods
     -------
@@ -68,6 +83,9 @@ class Genre(models.Model):
         max_length=NAME_LEN,
         verbose_name='Жанр произведения')
     slug = models.SlugField(max_length=SLUG_LEN, unique=True)
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True,
+        verbose_name='Дата изменения')
 
     def __str__(self):
         return f'{self.slug}'
@@ -78,6 +96,44 @@ class Genre(models.Model):
         verbose_name_plural = 'Жанры'
 
 
+class TitleQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers to keep the stored rating of titles up to date.
+    ...
+    Methods
+    -------
+    add_scores(score_delta, count_delta):
+        shift running score sum and review count in one UPDATE
+        and recalculate the rating from them.
+    recalculate_rating():
+        rebuild score sum, review count and rating from the reviews table.
+    """
+    def add_scores(self, score_delta, count_delta):
+        score_sum = F('score_sum') + score_delta
+        reviews_count = F('reviews_count') + count_delta
+        return self.update(
+            score_sum=score_sum,
+            reviews_count=reviews_count,
+            updated_at=timezone.now(),
+            rating=ExpressionWrapper(
+                Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+                output_field=FloatField()))
+
+    def recalculate_rating(self):
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0),
+            reviews_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0),
+            rating=Subquery(
+                reviews.annotate(total=Avg('score')).values('total')),
+            updated_at=timezone.now())
+
+
 class Title(models.Model):
     """
     Model to represent a titles.
@@ -89,14 +145,20 @@ class Title(models.Model):
         name of a title
     year: int
         creation year of a title
-    rating: int
+    rating: float
         average rating of title from all reviews
+    score_sum: int
+        sum of scores from all reviews
+    reviews_count: int
+        number of reviews on a title
     description: str
         description of a title
     genre: Genre
         genre of a title, link to genre model
     category: Category
         category of a title, link to category model
+    updated_at: DateTime
+        date of the last change of a title or its rating
 
     Methods
     -------
@@ -110,9 +172,16 @@ class Title(models.Model):
         verbose_name='Год издания',
         validators=[year_validator],
         db_index=True)
-    rating = models.IntegerField(
+    rating = models.FloatField(
         null=True, blank=True,
+        db_index=True,
         verbose_name='Рейтинг произведения')
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок')
+    reviews_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов')
     description = models.TextField(
         null=True, blank=True,
         verbose_name='Описание произведения',)
@@ -122,16 +191,63 @@ class Title(models.Model):
         Category, on_delete=models.SET_NULL,
         null=True, blank=True, related_name='titles',
         verbose_name='Категория')
+    updated_at = models.DateTimeField(
+        auto_now=True, db_index=True,
+        verbose_name='Дата изменения')
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-rating']
+        # порядок снимка каталога (api.catalog): при равном рейтинге
+        # новые первыми, в SQLite NULL при DESC и так идет последним
+        ordering = ['-rating', '-id']
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['year', '-rating', '-id'],
+                         name='title_year_rating_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name}'[:10]
 
 
+class ReviewQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers to keep comment counters of reviews up to date.
+    ...
+    Methods
+    -------
+    add_comments(count_delta):
+        shift the comment count in one UPDATE and take the date
+        of the last comment from the comments table.
+    recalculate_comments():
+        rebuild comment count and date of the last comment
+        from the comments table.
+    """
+    def last_comment_at(self):
+        return Subquery(Comment.objects.filter(
+            review=OuterRef('pk')).order_by('-pub_date').values(
+                'pub_date')[:1])
+
+    def add_comments(self, count_delta):
+        return self.update(
+            comments_count=F('comments_count') + count_delta,
+            last_comment_at=self.last_comment_at(),
+            updated_at=timezone.now())
+
+    def recalculate_comments(self):
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')).order_by().values('review')
+        return self.update(
+            comments_count=Coalesce(
+                Subquery(comments.annotate(total=Count('pk')).values(
+                    'total')),
+                0),
+            last_comment_at=self.last_comment_at(),
+            updated_at=timezone.now())
+
+
 class Review(models.Model):
     """
     Model to represent a reviews on a titles.
@@ -149,6 +265,12 @@ class Review(models.Model):
         rating of title in current review
     pub_date: DateTime
         review's publication date
+    comments_count: int
+        number of comments on a review
+    last_comment_at: DateTime
+        publication date of the last comment on a review
+    updated_at: DateTime
+        date of the last change of a review or its comment counters
 
     Methods
     -------
@@ -167,7 +289,8 @@ class Review(models.Model):
         verbose_name='Автор'
     )
     score = models.IntegerField(
-        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        validators=[MinValueValidator(MIN_SCORE),
+                    MaxValueValidator(MAX_SCORE)],
         verbose_name='Оценка',
         help_text='Оцените произведение от 1 до 10'
     )
@@ -175,12 +298,32 @@ class Review(models.Model):
         auto_now_add=True,
         verbose_name='Дата добавления отзыва'
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев')
+    last_comment_at = models.DateTimeField(
+        null=True, blank=True,
+        verbose_name='Дата последнего комментария')
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения отзыва'
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         unique_together = (('title', 'author'),)
+        indexes = [
+            models.Index(fields=['title', 'pub_date'],
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=['title', 'updated_at'],
+                         name='review_title_updated_at_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='review_author_pub_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Отзыв на произведение {self.title}. Оценка {self.score}'
@@ -201,6 +344,8 @@ class Comment(models.Model):
         author of comment
     pub_date: DateTime
         review's publication date
+    updated_at: DateTime
+        date of the last change of a comment
 
     Methods
     -------
@@ -221,11 +366,282 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата добавления комментария'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения комментария'
+    )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', 'pub_date'],
+                         name='comment_review_pub_date_idx'),
+            models.Index(fields=['review', 'updated_at'],
+                         name='comment_review_updated_at_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='comment_author_pub_date_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Комментарий на отзыв {self.review}'
+
+
+class RankingPriorQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers to keep the prior mean of rankings.
+    ...
+    Methods
+    -------
+    recalculate():
+        store the mean score of all reviews and return it.
+    get_stored_mean():
+        return the stored mean or None if it is not stored yet.
+    get_mean():
+        return the stored mean, calculated on first use.
+    """
+    def recalculate(self):
+        totals = Title.objects.aggregate(
+            score_sum=Sum('score_sum'), reviews_count=Sum('reviews_count'))
+        count = totals['reviews_count'] or 0
+        if count < settings.RANKING_MIN_REVIEWS:
+            # средняя нескольких оценок (или ноль без оценок) не
+            # сохраняется: она тянула бы все рейтинги к себе до полного
+            # пересчета, пока отзывов мало, средняя считается заново
+            self.filter(id=RankingPrior.ID).delete()
+            return totals['score_sum'] / count if count else None
+        mean = totals['score_sum'] / count
+        self.update_or_create(id=RankingPrior.ID, defaults={'mean': mean})
+        return mean
+
+    def get_stored_mean(self):
+        return self.filter(id=RankingPrior.ID).values_list(
+            'mean', flat=True).first()
+
+    def get_mean(self):
+        mean = self.get_stored_mean()
+        return self.recalculate() if mean is None else mean
+
+
+class RankingPrior(models.Model):
+    """
+    Model to represent the prior mean score of rankings.
+    One row, recalculated by a full refresh of rankings only,
+    so between refreshes every title is weighted with the same prior.
+    The row is stored once there are RANKING_MIN_REVIEWS reviews,
+    before that the mean is calculated on every use.
+    ...
+    Attributes
+    ----------
+    mean: float
+        mean score of all reviews at the last full refresh
+    updated_at: DateTime
+        date of the last full refresh
+    """
+    ID = 1
+
+    mean = models.FloatField(verbose_name='Средняя оценка')
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата пересчета')
+
+    objects = RankingPriorQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Априорная оценка рейтингов'
+        verbose_name_plural = 'Априорные оценки рейтингов'
+
+    def __str__(self) -> str:
+        return f'{self.mean:.2f}'
+
+
+class TitleRankingQuerySet(models.QuerySet):
+    """
+    QuerySet with a helper to rebuild materialized rankings.
+    ...
+    Methods
+    -------
+    refresh(title_ids=None):
+        rebuild ranking rows of the given titles with the stored
+        prior mean or, while no mean is stored, of all titles
+        with a recalculated one.
+    """
+    def refresh(self, title_ids=None):
+        titles = Title.objects.filter(reviews_count__gt=0)
+        rankings = self
+        prior_mean = None
+        if title_ids is not None:
+            # средняя всех оценок не пересчитывается на каждый отзыв:
+            # до полного пересчета все строки взвешены с одной и той же
+            prior_mean = RankingPrior.objects.get_stored_mean()
+        if prior_mean is None:
+            # средняя еще не сохранена, пока отзывов мало: рейтинги всех
+            # произведений пересчитываются с ней заново
+            prior_mean = RankingPrior.objects.recalculate()
+        else:
+            titles = titles.filter(id__in=title_ids)
+            rankings = rankings.filter(title_id__in=title_ids)
+        titles = titles.only(
+            'id', 'score_sum', 'reviews_count', 'category_id'
+        ).prefetch_related('genre')
+        weight = settings.RANKING_MIN_REVIEWS
+
+        rows = []
+        for title in titles:
+            weighted_rating = (
+                (title.score_sum + weight * prior_mean)
+                / (title.reviews_count + weight))
+            rows.append(TitleRanking(
+                title=title, weighted_rating=weighted_rating))
+            rows.extend(
+                TitleRanking(title=title, genre=genre,
+                             weighted_rating=weighted_rating)
+                for genre in title.genre.all())
+            if title.category_id is not None:
+                rows.append(TitleRanking(
+                    title=title, category_id=title.category_id,
+                    weighted_rating=weighted_rating))
+        rankings.delete()
+        self.bulk_create(rows)
+
+
+class TitleRanking(models.Model):
+    """
+    Model to represent a materialized ranking of titles.
+    Each title with reviews has one row in the overall ranking,
+    one row per genre and one row for its category.
+    Ordering by weighted rating field, descending.
+    ...
+    Attributes
+    ----------
+    title: Title
+        ranked title
+    genre: Genre
+        genre of the ranking, empty for overall and category rankings
+    category: Category
+        category of the ranking, empty for overall and genre rankings
+    weighted_rating: float
+        bayesian average of scores, pulled towards the mean score
+        of all titles while a title has few reviews
+    """
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE,
+        related_name='rankings',
+        verbose_name='Произведение')
+    genre = models.ForeignKey(
+        Genre, on_delete=models.CASCADE,
+        null=True, blank=True, related_name='rankings',
+        verbose_name='Жанр')
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE,
+        null=True, blank=True, related_name='rankings',
+        verbose_name='Категория')
+    weighted_rating = models.FloatField(
+        verbose_name='Взвешенный рейтинг')
+
+    objects = TitleRankingQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['-weighted_rating', '-title_id']
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Рейтинги произведений'
+        indexes = [
+            models.Index(
+                fields=['genre', 'category', '-weighted_rating', '-title'],
+                name='ranking_scope_order_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.title} - {self.weighted_rating:.2f}'
+
+
+class ScoreHistogramQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers to keep score histograms up to date.
+    ...
+    Methods
+    -------
+    shift(title_id, added=None, removed=None):
+        count an added score and uncount a removed one in one UPDATE.
+    recalculate(title_ids=None):
+        rebuild histograms from the reviews table.
+    """
+    def shift(self, title_id, added=None, removed=None):
+        counters = {}
+        if added is not None:
+            counters[f'score_{added}'] = F(f'score_{added}') + 1
+        if removed is not None:
+            counters[f'score_{removed}'] = F(f'score_{removed}') - 1
+        if added == removed or not counters:
+            return
+        if self.filter(title_id=title_id).update(**counters):
+            return
+        if added is None:
+            # строки счетчиков нет, снятую оценку вычитать не из чего
+            return
+        try:
+            with transaction.atomic():
+                self.create(title_id=title_id, **{f'score_{added}': 1})
+        except IntegrityError:
+            # строку счетчиков успел создать параллельный запрос
+            self.filter(title_id=title_id).update(**counters)
+
+    def recalculate(self, title_ids=None):
+        histograms = self
+        reviews = Review.objects.order_by()
+        if title_ids is not None:
+            histograms = histograms.filter(title_id__in=title_ids)
+            reviews = reviews.filter(title_id__in=title_ids)
+        rows = {}
+        for title_id, score, count in reviews.values_list(
+                'title_id', 'score').annotate(count=Count('pk')):
+            histogram = rows.setdefault(
+                title_id, ScoreHistogram(title_id=title_id))
+            setattr(histogram, f'score_{score}', count)
+        histograms.delete()
+        self.bulk_create(rows.values())
+
+
+class ScoreHistogram(models.Model):
+    """
+    Model to represent a distribution of review scores of a title.
+    One row of counters per title, one counter per possible score.
+    ...
+    Attributes
+    ----------
+    title: Title
+        title, whose reviews are counted
+    score_1 ... score_10: int
+        number of reviews with this score
+
+    Methods
+    -------
+    as_dict():
+        return counters as a mapping from score to number of reviews.
+    """
+    title = models.OneToOneField(
+        Title, on_delete=models.CASCADE,
+        primary_key=True, related_name='score_histogram',
+        verbose_name='Произведение')
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    objects = ScoreHistogramQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self) -> str:
+        return f'Оценки произведения {self.title_id}'
+
+    def as_dict(self):
+        return {score: getattr(self, f'score_{score}') for score in SCORES}
@@ -0,0 +1,67 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .models import (Comment, RankingPrior, Review, ScoreHistogram, Title,
+                     TitleRanking)
+
+# сумма оценок и число отзывов произведения изменились
+scores_changed = Signal()
+
+
+def create_ranking_prior(sender, **kwargs):
+    # строка средней оценки есть всегда, в том числе после flush
+    RankingPrior.objects.recalculate()
+
+
+def update_title_stats(title_id, added=None, removed=None):
+    """
+    Count an added score and uncount a removed one in the stored
+    rating, the score histogram and the rankings of a title.
+    """
+    score_delta = (added or 0) - (removed or 0)
+    count_delta = (added is not None) - (removed is not None)
+    Title.objects.filter(id=title_id).add_scores(score_delta, count_delta)
+    ScoreHistogram.objects.shift(title_id, added=added, removed=removed)
+    TitleRanking.objects.refresh([title_id])
+    scores_changed.send(sender=Title, title_id=title_id,
+                        score_delta=score_delta, count_delta=count_delta)
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, **kwargs):
+    # оценка и произведение до изменения, у нового отзыва - None
+    instance.stored_title_score = None
+    if instance.pk is not None:
+        instance.stored_title_score = Review.objects.filter(
+            pk=instance.pk).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, **kwargs):
+    stored = getattr(instance, 'stored_title_score', None)
+    if stored is None:
+        update_title_stats(instance.title_id, added=instance.score)
+        return
+    title_id, score = stored
+    if title_id != instance.title_id:
+        update_title_stats(title_id, removed=score)
+        update_title_stats(instance.title_id, added=instance.score)
+    elif score != instance.score:
+        update_title_stats(title_id, added=instance.score, removed=score)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # отзывы удаляются и каскадом вместе с автором или произведением
+    update_title_stats(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        Review.objects.filter(id=instance.review_id).add_comments(1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    Review.objects.filter(id=instance.review_id).add_comments(-1)
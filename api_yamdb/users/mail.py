@@ -0,0 +1,15 @@
+import os
+
+from django.core.mail.backends.filebased import EmailBackend
+from django.utils import timezone
+
+
+class RollingFileEmailBackend(EmailBackend):
+    """
+    File email backend writing all messages of a day into one
+    mailbox file, sent_emails/YYYY-MM-DD.log, instead of a new file
+    for every connection.
+    """
+    def _get_filename(self):
+        return os.path.join(
+            self.file_path, f'{timezone.localdate().isoformat()}.log')
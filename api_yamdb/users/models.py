@@ -1,14 +1,14 @@
-from django.contrib.auth.models import AbstractUser, BaseUserManager, Group
+from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.core import validators
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
-from .permissions import create_roles_and_permissions
+from .permissions import get_group
 
 
 def default_related_model():
-    group = Group.objects.get(name='user')
-    return group
+    return get_group('user')
 
 
 class UserManager(BaseUserManager):
@@ -17,16 +17,13 @@ class UserManager(BaseUserManager):
         user = self.model(username=username, email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
-        create_roles_and_permissions()
         return user
 
     def create_superuser(self, username, email=None, password=None,
                          **extra_fields):
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
-        create_roles_and_permissions()
-        admin_group = Group.objects.get(name='admin')
-        extra_fields['role'] = admin_group
+        extra_fields['role'] = self.model.USER_ROLE_ADMIN
         return self.create_user(username, email, password, **extra_fields)
 
 
@@ -79,3 +76,66 @@ class User(AbstractUser):
             return True
         else:
             return False
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    """
+    QuerySet of emails waiting in the outbox.
+    ...
+    Methods
+    -------
+    due(max_attempts):
+        emails whose next attempt is due and attempts are not used up.
+    """
+    def due(self, max_attempts):
+        return self.filter(
+            next_attempt_at__lte=timezone.now(),
+            attempts__lt=max_attempts).order_by('next_attempt_at', 'id')
+
+
+class OutboxEmail(models.Model):
+    """
+    Model to represent an email waiting to be sent.
+    A request only inserts a row, the send_emails command sends
+    the rows in batches and deletes the sent ones.
+    ...
+    Attributes
+    ----------
+    to: str
+        email of a recipient
+    from_email: str
+        email of a sender
+    subject: str
+        subject of a message
+    body: str
+        text of a message
+    created_at: datetime
+        time the email was queued
+    attempts: int
+        number of failed attempts to send the email
+    next_attempt_at: datetime
+        time of the next attempt, later after every failure
+    last_error: str
+        error of the last failed attempt
+    """
+    to = models.EmailField(max_length=254, verbose_name='Получатель')
+    from_email = models.EmailField(max_length=254, verbose_name='Отправитель')
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Письма в очереди'
+        indexes = [
+            models.Index(fields=('next_attempt_at',),
+                         name='outbox_next_attempt_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue_email(to, subject, body, from_email):
+    """
+    Put an email into the outbox: one INSERT, nothing is sent
+    within the request.
+    """
+    return OutboxEmail.objects.create(
+        to=to, subject=subject, body=body, from_email=from_email)
+
+
+def get_retry_delay(attempts):
+    # после каждой неудачи пауза вдвое длиннее
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(batch_size):
+    """
+    Take a batch of due emails for this process and return it.
+    The batch is claimed with one UPDATE that moves next_attempt_at
+    out by EMAIL_OUTBOX_CLAIM_TIMEOUT, only rows still due are updated,
+    so concurrent senders never get the same email.
+    """
+    now = timezone.now()
+    claimed_until = now + timedelta(
+        seconds=settings.EMAIL_OUTBOX_CLAIM_TIMEOUT)
+    ids = list(OutboxEmail.objects.due(
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS).values_list('id', flat=True)[
+            :batch_size])
+    if not ids:
+        return []
+    # строки, которые успел занять другой процесс, уже не подходят
+    # под next_attempt_at <= now и не обновляются
+    OutboxEmail.objects.filter(
+        id__in=ids, next_attempt_at__lte=now,
+    ).update(next_attempt_at=claimed_until)
+    return list(OutboxEmail.objects.filter(
+        id__in=ids, next_attempt_at=claimed_until).order_by('id'))
+
+
+def deliver(batch_size=None):
+    """
+    Claim one batch of due emails and send it over one mail connection.
+    Sent emails are deleted with one query, failed ones are retried
+    later with a growing delay until EMAIL_OUTBOX_MAX_ATTEMPTS.
+    Return numbers of sent and failed emails.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    emails = claim(batch_size)
+    if not emails:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, [email.to],
+                connection=connection)
+            try:
+                message.send()
+            except Exception as error:
+                failed.append((email, error))
+            else:
+                sent.append(email.id)
+    except Exception as error:
+        # сервер недоступен - неотправленные письма ждут следующей попытки
+        done = set(sent) | {email.id for email, _ in failed}
+        failed.extend((email, error) for email in emails
+                      if email.id not in done)
+    finally:
+        connection.close()
+
+    OutboxEmail.objects.filter(id__in=sent).delete()
+    now = timezone.now()
+    for email, error in failed:
+        email.attempts += 1
+        email.next_attempt_at = now + get_retry_delay(email.attempts)
+        email.last_error = f'{type(error).__name__}: {error}'
+        email.save(update_fields=['attempts', 'next_attempt_at',
+                                  'last_error'])
+    return len(sent), len(failed)
@@ -1,54 +1,89 @@
 from django.apps import apps
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
+# группы пользователей и их права: имя модели - действия над ней
+ROLE_PERMISSIONS = {
+    'user': {'user': ('change',)},
+    'moderator': {'moderator': ('change', 'delete')},
+    'admin': {'admin': ('change', 'delete', 'add')},
+}
+ACTIONS = ('delete', 'change', 'add')
 
-def create_roles_and_permissions():
-    # Создаем группы пользователей
-    user_group, _ = Group.objects.get_or_create(name='user')
-    moderator_group, _ = Group.objects.get_or_create(name='moderator')
-    admin_group, _ = Group.objects.get_or_create(name='admin')
-
-    # Получаем все модели в проекте
-    all_models = apps.get_models()
-
-    # Перебираем все модели и добавляем права доступа для них
-    for model in all_models:
-        content_type = ContentType.objects.get_for_model(model)
-
-        # Разрешение на удаление
-        delete_permission, _ = Permission.objects.get_or_create(
-            content_type=content_type,
-            codename='delete_%s' % model._meta.model_name,
-            defaults={'name': 'Can delete %s' % model._meta.verbose_name}
-        )
-
-        # Разрешение на изменение
-        change_permission, _ = Permission.objects.get_or_create(
-            content_type=content_type,
-            codename='change_%s' % model._meta.model_name,
-            defaults={'name': 'Can change %s' % model._meta.verbose_name}
-        )
-
-        # Разрешение на добавление
-        add_permission, _ = Permission.objects.get_or_create(
-            content_type=content_type,
-            codename='add_%s' % model._meta.model_name,
-            defaults={'name': 'Can add %s' % model._meta.verbose_name}
-        )
-
-        # Добавляем разрешения к соответствующей группе пользователей
-        if model._meta.model_name == 'user':
-            # Разрешения для модели User
-            user_group.permissions.add(change_permission)
-        elif model._meta.model_name == 'moderator':
-            # Разрешения для модели Moderator
-            moderator_group.permissions.add(change_permission)
-            moderator_group.permissions.add(delete_permission)
-        elif model._meta.model_name == 'admin':
-            # Разрешения для модели Admin
-            admin_group.permissions.add(change_permission)
-            admin_group.permissions.add(delete_permission)
-            admin_group.permissions.add(add_permission)
-
-    return user_group, moderator_group, admin_group
+# группы по имени, общие для всего процесса
+_groups = {}
+
+
+def create_roles_and_permissions(using=DEFAULT_DB_ALIAS):
+    """
+    Create groups of users and permissions to add, change and delete
+    every model, then give the groups their permissions.
+    Idempotent: only missing rows are created, with a fixed number
+    of queries whatever the number of models.
+    """
+    groups = {group.name: group for group in
+              Group.objects.using(using).filter(name__in=ROLE_PERMISSIONS)}
+    Group.objects.using(using).bulk_create([
+        Group(name=name) for name in ROLE_PERMISSIONS if name not in groups])
+    groups = {group.name: group for group in
+              Group.objects.using(using).filter(name__in=ROLE_PERMISSIONS)}
+
+    # Получаем все модели в проекте и их типы одним запросом
+    content_types = ContentType.objects.db_manager(using).get_for_models(
+        *apps.get_models())
+    permissions = {
+        (permission.content_type_id, permission.codename): permission
+        for permission in Permission.objects.using(using).filter(
+            content_type__in=content_types.values())}
+    missing = []
+    for model, content_type in content_types.items():
+        for action in ACTIONS:
+            codename = f'{action}_{model._meta.model_name}'
+            if (content_type.id, codename) not in permissions:
+                missing.append(Permission(
+                    content_type=content_type, codename=codename,
+                    name=f'Can {action} {model._meta.verbose_name}'))
+    if missing:
+        Permission.objects.using(using).bulk_create(missing)
+        permissions = {
+            (permission.content_type_id, permission.codename): permission
+            for permission in Permission.objects.using(using).filter(
+                content_type__in=content_types.values())}
+
+    # Добавляем разрешения к соответствующей группе пользователей
+    for name, models in ROLE_PERMISSIONS.items():
+        granted = [
+            permissions[content_type.id, f'{action}_{model_name}']
+            for model, content_type in content_types.items()
+            for model_name, actions in models.items()
+            if model._meta.model_name == model_name
+            for action in actions
+        ]
+        if granted:
+            groups[name].permissions.add(*granted)
+    clear_group_cache()
+    return groups['user'], groups['moderator'], groups['admin']
+
+
+def get_group(name):
+    """
+    Return a group of users by name, read from the database
+    once per process.
+    """
+    if name not in _groups:
+        _groups[name] = Group.objects.get(name=name)
+    return _groups[name]
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def clear_group_cache(**kwargs):
+    _groups.clear()
+
+
+def create_roles(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    # права создаются после всех миграций, в том числе после flush
+    create_roles_and_permissions(using)
@@ -0,0 +1,27 @@
+import pytest
+
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08QueryBudget:
+    url = '/api/v1/titles/'
+
+    @pytest.mark.parametrize('size', (1, 15))
+    def test_01_title_list(self, client, django_assert_num_queries, size):
+        create_catalog(size)
+        with django_assert_num_queries(3):
+            response = client.get(self.url)
+        assert len(response.json()['results']) == min(size, 10), (
+            f'Проверьте, что GET-запрос к `{self.url}` выполняет '
+            'фиксированное число SQL-запросов независимо от размера страницы.'
+        )
+
+    def test_02_title_detail(self, client, django_assert_num_queries):
+        title = create_catalog(1)[0]
+        with django_assert_num_queries(3):
+            response = client.get(f'{self.url}{title.id}/')
+        assert len(response.json()['genre']) == 2, (
+            f'Проверьте, что GET-запрос к `{self.url}{{title_id}}/` '
+            'возвращает жанры произведения.'
+        )
@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import cache
+
+from api.fast import get_plan
+from api.serializers import (CategorySerializer, CommmentSerializer,
+                             GenreSerializer, ReviewSerializer,
+                             TitleReadSerializer)
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+def create_content(author):
+    films = Category.objects.create(name='Фильм', slug='films')
+    Category.objects.create(name='Книга', slug='books')
+    horror = Genre.objects.create(name='Ужасы', slug='horror')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = []
+    for idx in range(12):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=1990 + idx,
+            description='' if idx % 3 else None,
+            category=films if idx % 4 else None,
+        )
+        title.genre.set([horror, comedy][:idx % 3])
+        Title.objects.filter(id=title.id).update(rating=idx / 2 or None)
+        titles.append(title)
+    review = Review.objects.create(
+        title=titles[0], author=author, text='Отзыв', score=7)
+    for idx in range(3):
+        Comment.objects.create(
+            review=review, author=author, text=f'Комментарий {idx}')
+    return titles[0], review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09FastRead:
+
+    @pytest.mark.parametrize('serializer_class', (
+        TitleReadSerializer, ReviewSerializer, CommmentSerializer,
+        CategorySerializer, GenreSerializer,
+    ))
+    def test_01_plan_compiled(self, serializer_class):
+        assert get_plan(serializer_class()) is not None, (
+            'Проверьте, что быстрый путь чтения поддерживает все поля '
+            f'`{serializer_class.__name__}`.'
+        )
+
+    def test_02_same_bytes(self, client, settings, user):
+        title, review = create_content(user)
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?page=2',
+            '/api/v1/titles/?genre=horror',
+            '/api/v1/titles/?fields=id,genre',
+            '/api/v1/titles/?exclude=category',
+            '/api/v1/categories/',
+            '/api/v1/genres/?search=Ужас',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/?fields=author,score',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            (f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+             '?limit=2&offset=1'),
+        )
+        for url in urls:
+            cache.clear()
+            settings.FAST_READ_PATH = True
+            fast = client.get(url)
+            cache.clear()
+            settings.FAST_READ_PATH = False
+            slow = client.get(url)
+            assert fast.status_code == slow.status_code == 200
+            assert fast.content == slow.content, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` без '
+                'сериализатора совпадает с ответом сериализатора байт в байт.'
+            )
@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.http import http_date
+
+from reviews.models import Genre, Review, Title
+from tests.utils import create_catalog, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ConditionalGet:
+    url = '/api/v1/titles/'
+
+    def test_01_title_detail_not_modified(self, client, user_client,
+                                          django_assert_num_queries):
+        title = create_catalog(1)[0]
+        url = f'{self.url}{title.id}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag and response.has_header('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and not response.content, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` получает ответ 304 без тела.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304
+
+        create_single_review(user_client, title.id, 'Отзыв', 5)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            'Проверьте, что новый отзыв меняет `ETag` произведения.'
+        )
+        assert response.json()['rating'] == 5
+
+    def test_02_collections_not_modified(self, client, user_client):
+        title = create_catalog(2)[0]
+        urls = (
+            self.url,
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            f'{self.url}{title.id}/reviews/',
+        )
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` получает ответ 304.'
+            )
+
+        create_single_review(user_client, title.id, 'Отзыв', 5)
+        response = client.get(
+            f'{self.url}{title.id}/reviews/',
+            HTTP_IF_NONE_MATCH=etags[f'{self.url}{title.id}/reviews/'])
+        assert response.status_code == 200
+
+        genre = Genre.objects.get(slug='horror')
+        genre.name = 'Хоррор'
+        genre.save()
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etags[self.url])
+        assert response.status_code == 200, (
+            'Проверьте, что изменение жанра меняет `ETag` списка '
+            'произведений.'
+        )
+        genres = response.json()['results'][0]['genre']
+        assert {'name': 'Хоррор', 'slug': 'horror'} in genres
+
+    def test_03_deleted_row(self, client, user_client, moderator_client):
+        title = create_catalog(2)[0]
+        create_single_review(user_client, title.id, 'Отзыв', 5)
+        create_single_review(moderator_client, title.id, 'Отзыв', 7)
+        # строки изменены давно, удаление дает время позже их всех
+        hour_ago = timezone.now() - timedelta(hours=1)
+        Title.objects.update(updated_at=hour_ago)
+        Review.objects.update(updated_at=hour_ago)
+        since = http_date((hour_ago + timedelta(seconds=1)).timestamp())
+        reviews_url = f'{self.url}{title.id}/reviews/'
+        for url in (self.url, reviews_url):
+            response = client.get(url)
+            assert not response.has_header('Last-Modified'), (
+                f'Проверьте, что ответ на GET-запрос к `{url}` не содержит '
+                '`Last-Modified`: удаление строки не меняет время '
+                'последнего изменения списка.'
+            )
+        embed_url = f'{self.url}{title.id}/?embed=reviews'
+        assert client.get(
+            embed_url, HTTP_IF_MODIFIED_SINCE=since).status_code == 304
+
+        older = Review.objects.get(score=5)
+        response = user_client.delete(f'{reviews_url}{older.id}/')
+        assert response.status_code == 204
+        Title.objects.exclude(id=title.id).delete()
+        for url in (self.url, reviews_url, embed_url):
+            response = client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+            assert response.status_code == 200, (
+                f'Проверьте, что после удаления строки GET-запрос к `{url}` '
+                'с `If-Modified-Since` получает новый ответ, а не 304.'
+            )
+        assert client.get(reviews_url).json()['count'] == 1
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+def create_dictionaries():
+    Category.objects.create(name='Фильм', slug='films')
+    Category.objects.create(name='Книга', slug='books')
+    Genre.objects.create(name='Ужасы', slug='horror')
+    Genre.objects.create(name='Комедия', slug='comedy')
+
+
+def make_items(size):
+    return [{
+        'name': f'Произведение {idx}',
+        'year': 2000 + idx % 20,
+        'genre': ['horror', 'comedy'][:idx % 3],
+        'category': 'films',
+    } for idx in range(size)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11BulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_only_admin(self, client, user_client):
+        create_dictionaries()
+        for api_client in (client, user_client):
+            response = api_client.post(
+                self.url, data=json.dumps(make_items(1)),
+                content_type='application/json')
+            assert response.status_code in (401, 403), (
+                f'Проверьте, что POST-запрос к `{self.url}` доступен '
+                'только администратору.'
+            )
+
+    @pytest.mark.parametrize('size', (5, 60))
+    def test_02_create(self, admin_client, client,
+                       django_assert_max_num_queries, size):
+        create_dictionaries()
+        client.get('/api/v1/titles/')
+        with django_assert_max_num_queries(14):
+            response = admin_client.post(
+                self.url, data=make_items(size), format='json')
+        assert response.status_code == 200, response.json()
+        results = response.json()['results']
+        assert len(results) == size == Title.objects.count(), (
+            f'Проверьте, что POST-запрос к `{self.url}` создает все '
+            'произведения за фиксированное число SQL-запросов.'
+        )
+        title = Title.objects.get(name='Произведение 2')
+        assert results[2]['id'] == title.id
+        assert results[2]['genre'] == ['horror', 'comedy']
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'horror']
+
+        data = client.get('/api/v1/titles/').json()
+        assert data['count'] == size, (
+            'Проверьте, что после пакетной загрузки список произведений '
+            'не отдается из кэша.'
+        )
+        suggest = client.get('/api/v1/titles/suggest/?q=произв').json()
+        assert suggest, (
+            'Проверьте, что загруженные пачкой произведения попадают '
+            'в подсказки.'
+        )
+
+    def test_03_errors(self, admin_client):
+        create_dictionaries()
+        items = make_items(3)
+        items[1]['genre'] = ['drama']
+        items[2]['year'] = 'год'
+        response = admin_client.post(self.url, data=items, format='json')
+        assert response.status_code == 400
+        errors = response.json()['errors']
+        assert errors[0] == {}
+        assert 'genre' in errors[1] and 'year' in errors[2], (
+            f'Проверьте, что POST-запрос к `{self.url}` возвращает ошибки '
+            'для каждого неверного элемента.'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что пачка с ошибками не записывается целиком.'
+        )
+
+        response = admin_client.post(
+            f'{self.url}?atomic=false&chunk_size=2', data=items,
+            format='json')
+        assert response.status_code == 200
+        assert response.json()['results'][0]['name'] == 'Произведение 0'
+        assert response.json()['results'][1] is None
+        assert Title.objects.count() == 1
+
+    def test_04_update_ndjson(self, admin_client):
+        create_dictionaries()
+        created = admin_client.post(
+            self.url, data=make_items(3), format='json').json()['results']
+        lines = [
+            {'id': created[0]['id'], 'genre': ['comedy']},
+            {'id': created[1]['id'], 'name': 'Новое имя',
+             'category': 'books'},
+            {'name': 'Новое произведение', 'year': 1999, 'genre': [],
+             'category': 'books'},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines)
+        response = admin_client.post(
+            self.url, data=body, content_type='application/x-ndjson')
+        assert response.status_code == 200, response.json()
+        results = response.json()['results']
+        assert results[0]['genre'] == ['comedy']
+        assert results[0]['name'] == 'Произведение 0'
+        assert results[1]['name'] == 'Новое имя'
+        assert results[1]['category'] == 'books'
+        assert results[1]['genre'] == ['horror']
+        assert Title.objects.count() == 4
+        assert list(Title.objects.get(id=created[0]['id']).genre.values_list(
+            'slug', flat=True)) == ['comedy']
@@ -0,0 +1,74 @@
+import pytest
+
+from reviews.models import Comment, Review, Title
+from tests.utils import create_catalog, create_thread
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Embed:
+
+    @pytest.mark.parametrize('reviews', (2, 6))
+    def test_01_embed(self, client, django_user_model,
+                      django_assert_num_queries, reviews):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, reviews, 3)
+        url = f'/api/v1/titles/{title.id}/'
+        with django_assert_num_queries(7):
+            response = client.get(f'{url}?embed=reviews:4,comments:2')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['reviews_count'] == reviews
+        expected = client.get(f'{url}reviews/').json()['results'][:4]
+        assert [review['id'] for review in data['reviews']] == [
+            review['id'] for review in expected], (
+            f'Проверьте, что GET-запрос к `{url}?embed=reviews:N` '
+            'возвращает первые N отзывов в порядке списка отзывов.'
+        )
+        for review in data['reviews']:
+            comments = client.get(
+                f'{url}reviews/{review["id"]}/comments/').json()
+            assert review['comments_count'] == comments['count']
+            assert review['comments'] == comments['results'][:2], (
+                'Проверьте, что к каждому отзыву вложены его первые '
+                'комментарии.'
+            )
+
+    def test_02_embed_reviews_only(self, client, django_user_model):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 12, 1)
+        data = client.get(f'/api/v1/titles/{title.id}/?embed=reviews').json()
+        assert len(data['reviews']) == 10
+        assert 'comments' not in data['reviews'][0]
+
+    @pytest.mark.parametrize('embed', (
+        'comments', 'reviews:x', 'authors', 'reviews,comments:-1'))
+    def test_03_bad_embed(self, client, embed):
+        title = create_catalog(1)[0]
+        response = client.get(f'/api/v1/titles/{title.id}/?embed={embed}')
+        assert response.status_code == 400
+
+    def test_04_new_comment_changes_etag(self, client, django_user_model):
+        title = create_catalog(1)[0]
+        users = create_thread(django_user_model, title, 2, 1)
+        url = f'/api/v1/titles/{title.id}/?embed=reviews,comments'
+        etag = client.get(url)['ETag']
+        review = Review.objects.get(author=users[1])
+        Comment.objects.create(review=review, author=users[0], text='Еще')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['reviews'][0]['comments_count'] == 2
+
+    def test_05_embed_with_fields(self, client, django_user_model,
+                                  django_assert_num_queries):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 3, 0)
+        url = f'/api/v1/titles/{title.id}/?embed=reviews&fields=id'
+        # валидаторы произведения и отзывов, произведение, отзывы
+        with django_assert_num_queries(4):
+            response = client.get(url)
+        data = response.json()
+        assert set(data) == {'id', 'reviews_count', 'reviews'}, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает число отзывов '
+            'без второго запроса к произведению.'
+        )
+        assert data['reviews_count'] == 3
@@ -0,0 +1,98 @@
+import pytest
+
+from reviews.models import Review
+from tests.utils import create_catalog, create_thread
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Counts:
+    url = '/api/v1/titles/'
+
+    def test_01_count_false(self, client):
+        create_catalog(15)
+        data = client.get(f'{self.url}?count=false').json()
+        assert 'count' not in data, (
+            f'Проверьте, что GET-запрос к `{self.url}?count=false` '
+            'не возвращает число объектов.'
+        )
+        assert len(data['results']) == 10 and data['previous'] is None
+        assert data['next'] is not None
+        data = client.get(data['next']).json()
+        assert len(data['results']) == 5
+        assert data['next'] is None and data['previous'] is not None
+        response = client.get(f'{self.url}?count=false&page=3')
+        assert response.status_code == 404
+
+    def test_02_count_false_limit_offset(self, client, django_user_model):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 3, 0)
+        url = f'{self.url}{title.id}/reviews/?count=false&limit=2'
+        data = client.get(url).json()
+        assert 'count' not in data and len(data['results']) == 2
+        data = client.get(data['next']).json()
+        assert len(data['results']) == 1 and data['next'] is None
+
+    def test_03_known_count(self, client, django_user_model,
+                            django_assert_max_num_queries):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 3, 0)
+        for url, count in ((self.url, 1),
+                           (f'{self.url}{title.id}/reviews/', 3)):
+            with django_assert_max_num_queries(4) as context:
+                data = client.get(url).json()
+            assert data['count'] == count
+            counts = [query['sql'] for query in context.captured_queries
+                      if 'COUNT(' in query['sql'].upper()]
+            assert len(counts) <= 1, (
+                f'Проверьте, что GET-запрос к `{url}` не считает строки '
+                'второй раз для пагинации.'
+            )
+
+    def test_04_approximate_count(self, client, user, settings):
+        settings.PAGINATION_COUNT_CAP = 12
+        for title in create_catalog(15):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=5)
+        url = '/api/v1/reviews/search/'
+        data = client.get(url, data={'search': 'отзыв'}).json()
+        assert data['count'] == 12 and data['approximate'] is True, (
+            'Проверьте, что число объектов больше PAGINATION_COUNT_CAP '
+            'отдается как оценка с `approximate: true`.'
+        )
+        assert len(data['results']) == 10 and data['next'] is not None
+        data = client.get(data['next']).json()
+        assert len(data['results']) == 5 and data['next'] is None
+
+    def test_05_cached_count(self, client, user, django_assert_num_queries):
+        url = '/api/v1/reviews/search/'
+        search = {'search': 'отзыв'}
+        titles = create_catalog(4)
+        for title in titles[:3]:
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=5)
+        assert client.get(url, data=search).json()['count'] == 3
+        with django_assert_num_queries(1):
+            data = client.get(url, data=search).json()
+        assert data['count'] == 3, (
+            'Проверьте, что число объектов для того же фильтра '
+            'берется из кэша.'
+        )
+        assert client.get(
+            url, data={**search, 'count': 0}).json()['results']
+        Review.objects.create(
+            title=titles[3], author=user, text='Отзыв', score=5)
+        data = client.get(url, data=search).json()
+        assert data['count'] == 4 and len(data['results']) == 4, (
+            'Проверьте, что новый отзыв сбрасывает число объектов в кэше.'
+        )
+
+    def test_06_users_not_cached(self, admin_client, django_user_model):
+        url = '/api/v1/users/'
+        assert admin_client.get(url).json()['count'] == 1
+        django_user_model.objects.create_user(
+            username='reader', email='reader@yamdb.fake')
+        data = admin_client.get(url).json()
+        assert data['count'] == 2 and len(data['results']) == 2, (
+            f'Проверьте, что GET-запрос к `{url}` показывает нового '
+            'пользователя сразу после его создания.'
+        )
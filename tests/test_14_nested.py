@@ -0,0 +1,58 @@
+import pytest
+
+from reviews.models import Comment, Review
+from tests.utils import create_catalog, create_thread
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14Nested:
+
+    def test_01_list_budget(self, client, django_user_model,
+                            django_assert_num_queries):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 4, 3)
+        review = Review.objects.filter(comments__isnull=False).first()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert response.status_code == 200
+        url = f'{url}{review.id}/comments/'
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` находит отзыв одним '
+            'запросом и загружает авторов вместе с комментариями.'
+        )
+
+    def test_02_wrong_chain(self, client, user_client, django_user_model):
+        titles = create_catalog(2)
+        create_thread(django_user_model, titles[0], 2, 3)
+        review = Review.objects.filter(comments__isnull=False).first()
+        url = f'/api/v1/titles/{titles[1].id}/reviews/{review.id}/comments/'
+        assert client.get(url).status_code == 404, (
+            f'Проверьте, что GET-запрос к `{url}` проверяет, что отзыв '
+            'относится к произведению из адреса.'
+        )
+        comment = review.comments.first()
+        assert client.get(f'{url}{comment.id}/').status_code == 404
+        response = user_client.post(url, data={'text': 'Мимо'})
+        assert response.status_code == 404
+        assert not Comment.objects.filter(text='Мимо').exists()
+
+    def test_03_author_update(self, user_client, user, django_user_model,
+                              django_assert_max_num_queries):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 1, 0)
+        review = Review.objects.create(
+            title=title, author=user, text='Мой отзыв', score=5)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        with django_assert_max_num_queries(11):
+            response = user_client.patch(
+                url, data={'text': 'Исправленный отзыв'}, format='json')
+        assert response.status_code == 200, response.json()
+        assert response.json()['author'] == user.username
+        other = Review.objects.exclude(author=user).get()
+        response = user_client.patch(
+            f'/api/v1/titles/{title.id}/reviews/{other.id}/',
+            data={'text': 'Чужой отзыв'}, format='json')
+        assert response.status_code == 403
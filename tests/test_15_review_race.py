@@ -0,0 +1,83 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+THREADS = 4
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ReviewRace:
+
+    def test_01_second_review_without_check(
+            self, user_client, django_assert_max_num_queries):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with django_assert_max_num_queries(20) as context:
+            response = user_client.post(
+                url, data={'text': 'Первый', 'score': 5})
+        assert response.status_code == 201
+        assert not any(
+            query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+            for query in context.captured_queries), (
+            f'Проверьте, что POST-запрос к `{url}` не проверяет отдельным '
+            'запросом, есть ли уже отзыв пользователя.'
+        )
+        response = user_client.post(url, data={'text': 'Второй', 'score': 1})
+        assert response.status_code == 400
+        assert response.json() == {
+            'non_field_errors': ['Вы уже написали свой отзыв!']}
+        title.refresh_from_db()
+        assert title.reviews_count == 1 and title.score_sum == 5, (
+            'Проверьте, что отклоненный второй отзыв не меняет '
+            'счетчики произведения.'
+        )
+
+    def test_02_parallel_posts(self, token_user, monkeypatch):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+        # SQLite пишет в одной транзакции за раз: транзакции записи
+        # идут по очереди, а все, что до них, - параллельно
+        write_lock = threading.RLock()
+        atomic = transaction.atomic
+
+        @contextmanager
+        def serialized_atomic(*args, **kwargs):
+            with write_lock, atomic(*args, **kwargs):
+                yield
+
+        monkeypatch.setattr(transaction, 'atomic', serialized_atomic)
+
+        def post(score):
+            client = APIClient()
+            client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {token_user["access"]}')
+            barrier.wait()
+            try:
+                response = client.post(
+                    url, data={'text': f'Отзыв {score}', 'score': score})
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=post, args=(score,))
+                   for score in range(1, THREADS + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(statuses) == [201] + [400] * (THREADS - 1), (
+            'Проверьте, что из одновременных POST-запросов одного '
+            'пользователя отзыв создает ровно один.'
+        )
+        assert Review.objects.filter(title=title).count() == 1
+        assert Title.objects.get(id=title.id).reviews_count == 1
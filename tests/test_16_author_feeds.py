@@ -0,0 +1,60 @@
+import pytest
+
+from reviews.models import Comment, Review
+from tests.utils import create_catalog, create_thread
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16AuthorFeeds:
+
+    def test_01_reviews(self, client, django_user_model,
+                        django_assert_num_queries):
+        titles = create_catalog(12)
+        author = django_user_model.objects.create_user(
+            username='critic', email='critic@yamdb.fake')
+        for idx, title in enumerate(titles):
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {idx}', score=5)
+        create_thread(django_user_model, titles[0], 2, 0)
+        url = '/api/v1/users/critic/reviews/'
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert [item['text'] for item in data['results']] == [
+            f'Отзыв {idx}' for idx in range(11, 1, -1)], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает отзывы '
+            'пользователя, новые первыми.'
+        )
+        assert data['results'][0]['author'] == 'critic'
+        assert data['results'][0]['title'] == titles[11].id
+        data = client.get(data['next']).json()
+        assert [item['text'] for item in data['results']] == [
+            'Отзыв 1', 'Отзыв 0']
+        assert data['next'] is None
+
+    def test_02_comments(self, client, django_user_model):
+        title = create_catalog(1)[0]
+        users = create_thread(django_user_model, title, 3, 2)
+        url = f'/api/v1/users/{users[0].username}/comments/'
+        response = client.get(url)
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == Comment.objects.filter(
+            author=users[0]).count() > 0, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает комментарии '
+            'пользователя.'
+        )
+        assert client.get('/api/v1/users/nobody/comments/').status_code == 404
+
+    def test_03_index(self, django_user_model):
+        user = django_user_model.objects.create_user(
+            username='critic', email='critic@yamdb.fake')
+        for model, index in ((Review, 'review_author_pub_date_idx'),
+                             (Comment, 'comment_author_pub_date_idx')):
+            plan = model.objects.filter(author=user).order_by(
+                '-pub_date', '-id')[:10].explain()
+            assert index in plan, (
+                'Проверьте, что история пользователя читается по индексу '
+                f'{index}.'
+            )
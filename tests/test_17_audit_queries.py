@@ -0,0 +1,63 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.audit import audit
+from api.urls import router_v1
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17AuditQueries:
+
+    def test_01_report(self):
+        out = StringIO()
+        call_command('audit_queries', stdout=out)
+        report = out.getvalue()
+        for url in ('/api/v1/titles/', '/api/v1/categories/',
+                    '/api/v1/titles/top/', '/api/v1/users/'):
+            assert f'GET {url} 200' in report, (
+                f'Проверьте, что команда audit_queries запрашивает `{url}`.'
+            )
+        assert 'Запросов с замечаниями' in report
+        assert not Title.objects.exists() and not Review.objects.exists(), (
+            'Проверьте, что команда audit_queries не оставляет в базе '
+            'тестовые данные.'
+        )
+
+    def test_02_no_scans_on_hot_routes(self):
+        report, proposals = audit(router_v1)
+        problems = {
+            url: [problem for sql, found in queries for problem in found]
+            for url, status, queries in report
+        }
+        # жанры страницы сортируются по slug во временном B-дереве,
+        # это несколько строк на страницу
+        genres_order = ('temp b-tree for order by', 'reviews_title_genre')
+        for url, found in problems.items():
+            found = [problem for problem in found if problem != genres_order]
+            if '/reviews/' in url or url.endswith('/top/'):
+                assert not found, (
+                    f'Проверьте, что запросы `{url}` идут по индексам: '
+                    f'{found}'
+                )
+        year = next(url for url in problems if url.endswith('?year=2000'))
+        assert ('temp b-tree for order by', 'reviews_title') not in (
+            problems[year])
+        assert not any(table == 'reviews_review'
+                       for table, columns in proposals)
+
+    def test_03_existing_data(self, django_user_model):
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.create(name='Ужасы', slug='horror')
+        django_user_model.objects.create_user(
+            username='auditor0', email='auditor0@yamdb.fake')
+        for attempt in range(2):
+            out = StringIO()
+            call_command('audit_queries', stdout=out)
+            assert 'Запросов с замечаниями' in out.getvalue(), (
+                'Проверьте, что команда audit_queries работает на базе '
+                'с уже заполненным каталогом.'
+            )
+        assert Genre.objects.count() == 1
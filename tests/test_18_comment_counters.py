@@ -0,0 +1,72 @@
+import pytest
+
+from reviews.models import Comment, Review, Title
+from tests.utils import create_catalog
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18CommentCounters:
+
+    def test_01_counters(self, user, user_client, moderator_client, client,
+                         django_assert_max_num_queries):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7)
+        Title.objects.filter(id=title.id).recalculate_rating()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        comments_url = f'{url}{review.id}/comments/'
+        created = [
+            api_client.post(comments_url, data={'text': text}).json()
+            for api_client, text in ((user_client, 'Первый'),
+                                     (moderator_client, 'Второй'))
+        ]
+
+        with django_assert_max_num_queries(3) as context:
+            data = client.get(url).json()['results'][0]
+        assert data['comments_count'] == 2
+        assert data['last_comment_at'] == created[1]['pub_date'], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает число '
+            'комментариев и дату последнего комментария к отзыву.'
+        )
+        assert not any('reviews_comment' in query['sql']
+                       for query in context.captured_queries), (
+            f'Проверьте, что GET-запрос к `{url}` не обращается '
+            'к таблице комментариев.'
+        )
+
+        response = moderator_client.delete(
+            f'{comments_url}{created[1]["id"]}/')
+        assert response.status_code == 204
+        data = client.get(url).json()['results'][0]
+        assert data['comments_count'] == 1
+        assert data['last_comment_at'] == created[0]['pub_date']
+        assert client.get(comments_url).json()['count'] == 1
+
+    def test_02_read_only(self, user, user_client):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7)
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        response = user_client.patch(url, data={'comments_count': 100})
+        assert response.status_code == 200
+        assert response.json()['comments_count'] == 0
+
+    def test_03_orm_and_cascade(self, user, moderator, admin_client):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=moderator, text='Отзыв', score=7)
+        for author in (user, moderator, user):
+            Comment.objects.create(review=review, author=author, text='Ответ')
+        review.refresh_from_db()
+        assert review.comments_count == 3, (
+            'Проверьте, что комментарий, созданный не через API, '
+            'учитывается в счетчике комментариев отзыва.'
+        )
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        review.refresh_from_db()
+        assert review.comments_count == 1, (
+            'Проверьте, что после удаления автора его комментарии '
+            'не учитываются в счетчике комментариев отзыва.'
+        )
+        assert review.last_comment_at == review.comments.get().pub_date
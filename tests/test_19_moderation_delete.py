@@ -0,0 +1,127 @@
+import re
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import Comment, Review, Title
+from tests.utils import create_catalog
+
+URL = '/api/v1/moderation/delete/'
+
+
+def create_reviews(titles, authors):
+    reviews = []
+    for title in titles:
+        for score, author in enumerate(authors, start=4):
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score)
+            for comment_author in authors:
+                Comment.objects.create(
+                    review=review, author=comment_author, text='Комментарий')
+            reviews.append(review)
+    Title.objects.all().recalculate_rating()
+    Review.objects.all().recalculate_comments()
+    return reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ModerationDelete:
+
+    def test_01_permissions(self, client, user_client, moderator_client,
+                            admin_client):
+        data = {'reviews': [1]}
+        assert client.post(URL, data=data).status_code == 401
+        response = user_client.post(URL, data=data, format='json')
+        assert response.status_code == 403, (
+            f'Проверьте, что POST-запрос к `{URL}` от пользователя '
+            'с ролью user возвращает ответ со статусом 403.'
+        )
+        for api_client in (moderator_client, admin_client):
+            response = api_client.post(URL, data=data, format='json')
+            assert response.status_code == 200, (
+                f'Проверьте, что POST-запрос к `{URL}` от модератора '
+                'и администратора возвращает ответ со статусом 200.'
+            )
+
+    def test_02_validation(self, moderator_client):
+        for data in ({}, {'reviews': []}, {'since': '2020-01-01T00:00'},
+                     {'author': 'nobody'}, {'reviews': ['x']}):
+            response = moderator_client.post(URL, data=data, format='json')
+            assert response.status_code == 400, (
+                f'Проверьте, что POST-запрос к `{URL}` с данными {data} '
+                'возвращает ответ со статусом 400.'
+            )
+
+    def test_03_by_ids(self, user, moderator, moderator_client):
+        titles = create_catalog(2)
+        reviews = create_reviews(titles, (user, moderator))
+        comment = reviews[1].comments.first()
+        response = moderator_client.post(URL, data={
+            'reviews': [reviews[0].id], 'comments': [comment.id]},
+            format='json')
+        assert response.status_code == 200
+        assert response.json() == {'reviews': 1, 'comments': 3}, (
+            f'Проверьте, что POST-запрос к `{URL}` удаляет отзывы '
+            'вместе с комментариями и возвращает число удаленных строк.'
+        )
+        assert not Review.objects.filter(id=reviews[0].id).exists()
+        assert not Comment.objects.filter(review_id=reviews[0].id).exists()
+
+        title = Title.objects.get(id=titles[0].id)
+        assert title.reviews_count == 1
+        assert title.rating == 5, (
+            'Проверьте, что после удаления отзывов рейтинг произведения '
+            'пересчитывается.'
+        )
+        assert Review.objects.get(id=reviews[1].id).comments_count == 1, (
+            'Проверьте, что после удаления комментариев счетчик '
+            'комментариев отзыва пересчитывается.'
+        )
+        assert Title.objects.get(id=titles[1].id).reviews_count == 2
+
+    def test_04_by_author_since(self, user, moderator, moderator_client):
+        titles = create_catalog(4)
+        create_reviews(titles[:3], (user, moderator))
+        since = timezone.now()
+        late = create_reviews(titles[3:], (user, moderator))
+        response = moderator_client.post(URL, data={
+            'author': user.username, 'since': since.isoformat()},
+            format='json')
+        assert response.status_code == 200
+        assert response.json() == {'reviews': 1, 'comments': 3}
+        assert not Review.objects.filter(id=late[0].id).exists()
+        assert Review.objects.filter(author=user).count() == 3
+        assert Comment.objects.filter(author=user).count() == 6
+        assert Review.objects.get(id=late[1].id).comments_count == 1
+
+        response = moderator_client.post(
+            URL, data={'author': user.username}, format='json')
+        assert response.json() == {'reviews': 3, 'comments': 9}
+        assert not Review.objects.filter(author=user).exists()
+        assert not Comment.objects.filter(author=user).exists()
+        for title in Title.objects.all():
+            assert title.reviews_count == 1 and title.rating == 5
+        assert set(Review.objects.values_list(
+            'comments_count', flat=True)) == {1}
+
+    def test_05_queries_per_chunk(self, user, moderator, moderator_client,
+                                  django_assert_max_num_queries, settings):
+        settings.BULK_DELETE_CHUNK_SIZE = 5
+        titles = create_catalog(10)
+        create_reviews(titles, (user, moderator))
+        # по две пачки отзывов и комментариев, запросы зависят
+        # от числа пачек, а не от числа строк
+        with django_assert_max_num_queries(40) as context:
+            response = moderator_client.post(
+                URL, data={'author': moderator.username}, format='json')
+        assert response.json() == {'reviews': 10, 'comments': 30}
+        comments = [query['sql'] for query in context.captured_queries
+                    if 'FROM "reviews_comment"' in query['sql']]
+        for sql in comments:
+            for ids in re.findall(r'IN \(([\d, ]+)\)', sql):
+                assert len(ids.split(',')) <= 5, (
+                    'Проверьте, что в запросы попадают только id одной '
+                    'пачки, остальные отзывы выбираются подзапросом.'
+                )
+        assert all(title.reviews_count == 1 and title.rating == 4
+                   for title in Title.objects.all())
@@ -0,0 +1,73 @@
+import pytest
+
+from reviews.models import Comment
+from tests.utils import create_catalog, create_thread
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20IncludeComments:
+
+    @pytest.mark.parametrize('comments', (1, 4))
+    def test_01_include_comments(self, client, django_user_model,
+                                 django_assert_num_queries, comments):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 5, comments)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with django_assert_num_queries(5) as context:
+            response = client.get(f'{url}?include_comments=3')
+        assert response.status_code == 200
+        assert sum('reviews_comment' in query['sql']
+                   for query in context.captured_queries) == 2, (
+            f'Проверьте, что GET-запрос к `{url}?include_comments=N` '
+            'читает комментарии всей страницы одним запросом.'
+        )
+        reviews = response.json()['results']
+        assert [review['id'] for review in reviews] == [
+            review['id'] for review in client.get(url).json()['results']]
+        for review in reviews:
+            expected = client.get(
+                f'{url}{review["id"]}/comments/').json()['results']
+            assert review['comments'] == expected[:3], (
+                f'Проверьте, что GET-запрос к `{url}?include_comments=N` '
+                'возвращает к каждому отзыву его последние N комментариев.'
+            )
+
+    def test_02_without_param(self, client, django_user_model):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 2, 1)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = client.get(url).json()['results'][0]
+        assert 'comments' not in review
+        for value in ('0', '00'):
+            review = client.get(
+                f'{url}?include_comments={value}').json()['results'][0]
+            assert 'comments' not in review, (
+                f'Проверьте, что GET-запрос к `{url}?include_comments=0` '
+                'возвращает отзывы без комментариев.'
+            )
+        response = client.get(f'{url}?include_comments=100')
+        assert all(len(review['comments']) <= 20
+                   for review in response.json()['results'])
+
+    @pytest.mark.parametrize('value', ('x', '-1', '2.5'))
+    def test_03_bad_value(self, client, value):
+        title = create_catalog(1)[0]
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/?include_comments={value}')
+        assert response.status_code == 400
+
+    def test_04_edited_comment_changes_etag(self, client, django_user_model):
+        title = create_catalog(1)[0]
+        create_thread(django_user_model, title, 2, 1)
+        url = f'/api/v1/titles/{title.id}/reviews/?include_comments=1'
+        etag = client.get(url)['ETag']
+        comment = Comment.objects.get()
+        comment.text = 'Исправлено'
+        comment.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что правка комментария меняет ETag `{url}`.'
+        )
+        comments = [comment for review in response.json()['results']
+                    for comment in review['comments']]
+        assert comments[0]['text'] == 'Исправлено'
@@ -0,0 +1,61 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.permissions import create_roles_and_permissions, get_group
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Roles:
+
+    def test_01_after_migrate(self):
+        assert set(Group.objects.values_list('name', flat=True)) == {
+            'user', 'moderator', 'admin'}, (
+            'Проверьте, что группы пользователей создаются после migrate.'
+        )
+        assert Group.objects.get(name='user').permissions.filter(
+            codename='change_user').exists()
+
+    def test_02_idempotent(self, django_assert_max_num_queries):
+        permissions = Permission.objects.count()
+        with django_assert_max_num_queries(8):
+            create_roles_and_permissions()
+        out = StringIO()
+        call_command('create_roles', stdout=out)
+        assert 'user: прав 1' in out.getvalue()
+        assert Group.objects.count() == 3
+        assert Permission.objects.count() == permissions, (
+            'Проверьте, что повторное создание ролей не добавляет строк.'
+        )
+
+    def test_03_recreated(self):
+        Group.objects.all().delete()
+        Permission.objects.filter(codename='change_user').delete()
+        create_roles_and_permissions()
+        assert Group.objects.get(name='user').permissions.filter(
+            codename='change_user').exists()
+
+    def test_04_signup_queries(self, client):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/signup/', data={
+                'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        assert response.status_code == 200
+        assert not any('auth_group' in query['sql']
+                       or 'auth_permission' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что регистрация не создает группы и права доступа.'
+        )
+
+    def test_05_group_cache(self, django_assert_num_queries):
+        group = get_group('moderator')
+        with django_assert_num_queries(0):
+            assert get_group('moderator') == group
+        group.name = 'moderators'
+        group.save()
+        assert get_group('admin').name == 'admin'
+        with pytest.raises(Group.DoesNotExist):
+            get_group('moderator')
@@ -0,0 +1,54 @@
+import pytest
+from django.core import mail
+
+from users.models import User
+from users.outbox import deliver
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22SignupQueries:
+
+    def test_01_new_and_existing(self, client, django_assert_max_num_queries):
+        data = {'username': 'newcomer', 'email': 'newcomer@yamdb.fake'}
+        for attempt in range(2):
+            with django_assert_max_num_queries(3):
+                response = client.post(URL_SIGNUP, data=data)
+            assert response.status_code == 200, (
+                f'Проверьте, что POST-запрос к `{URL_SIGNUP}` делает '
+                'не больше трех запросов к базе.'
+            )
+            deliver()
+            code = mail.outbox[-1].body.split()[-1]
+            assert User.objects.get(
+                username='newcomer').confirmation_code == code, (
+                'Проверьте, что в письме отправляется тот же код '
+                'подтверждения, что сохранен у пользователя.'
+            )
+            response = client.post(URL_TOKEN, data={
+                'username': 'newcomer', 'confirmation_code': code})
+            assert 'token' in response.json()
+        assert User.objects.filter(username='newcomer').count() == 1
+
+    @pytest.mark.parametrize('data, fields', (
+        ({'username': 'newcomer', 'email': 'other@yamdb.fake'},
+         {'username'}),
+        ({'username': 'other', 'email': 'newcomer@yamdb.fake'}, {'email'}),
+        ({'username': 'newcomer', 'email': 'taken@yamdb.fake'},
+         {'username', 'email'}),
+    ))
+    def test_02_conflicts(self, client, django_assert_max_num_queries,
+                          data, fields):
+        User.objects.create_user(username='newcomer',
+                                 email='newcomer@yamdb.fake')
+        User.objects.create_user(username='taken', email='taken@yamdb.fake')
+        with django_assert_max_num_queries(1):
+            response = client.post(URL_SIGNUP, data=data)
+        assert response.status_code == 400
+        assert set(response.json()) == fields, (
+            f'Проверьте, что POST-запрос к `{URL_SIGNUP}` с занятыми '
+            'username или email возвращает ошибки этих полей.'
+        )
+        assert User.objects.count() == 2
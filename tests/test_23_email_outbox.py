@@ -0,0 +1,132 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users import outbox
+from users.models import OutboxEmail
+from users.outbox import claim, deliver, enqueue_email
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        if any('broken' in address for message in messages
+               for address in message.to):
+            raise ConnectionError('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class ConcurrentBackend(EmailBackend):
+    # пока отправляется пачка, письма пытается отправить еще один процесс
+    concurrent = []
+
+    def send_messages(self, messages):
+        if not self.concurrent:
+            self.concurrent.append(deliver())
+        return super().send_messages(messages)
+
+
+def enqueue(count, prefix='reader'):
+    for idx in range(count):
+        enqueue_email(f'{prefix}{idx}@yamdb.fake', 'Тема', f'Письмо {idx}',
+                      'robot@yamdb.fake')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23EmailOutbox:
+
+    def test_01_signup_enqueues(self, client, django_assert_max_num_queries):
+        with django_assert_max_num_queries(3):
+            response = client.post('/api/v1/auth/signup/', data={
+                'username': 'newcomer', 'email': 'newcomer@yamdb.fake'})
+        assert response.status_code == 200
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо '
+            'в запросе, а ставит его в очередь.'
+        )
+        assert OutboxEmail.objects.get().to == 'newcomer@yamdb.fake'
+        assert deliver() == (1, 0)
+        assert mail.outbox[0].to == ['newcomer@yamdb.fake']
+        assert not OutboxEmail.objects.exists()
+
+    def test_02_batches_over_one_connection(self, monkeypatch):
+        connections = []
+        get_connection = outbox.get_connection
+
+        def counted(**kwargs):
+            connections.append(get_connection(**kwargs))
+            return connections[-1]
+
+        monkeypatch.setattr(outbox, 'get_connection', counted)
+        enqueue(5)
+        out = StringIO()
+        call_command('send_emails', batch_size=2, stdout=out)
+        assert 'Отправлено писем: 5' in out.getvalue()
+        assert len(mail.outbox) == 5
+        assert len(connections) == 3, (
+            'Проверьте, что каждая пачка писем отправляется '
+            'через одно соединение.'
+        )
+        assert not OutboxEmail.objects.exists()
+
+    def test_03_retry_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_23_email_outbox.FailingBackend'
+        enqueue(2)
+        enqueue(1, prefix='broken')
+        assert deliver() == (2, 1)
+        email = OutboxEmail.objects.get()
+        assert email.attempts == 1 and 'ConnectionError' in email.last_error
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что неотправленное письмо повторяется позже.'
+        )
+        assert deliver() == (0, 0)
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        deliver()
+        delay = OutboxEmail.objects.get().next_attempt_at - timezone.now()
+        assert delay.total_seconds() > settings.EMAIL_OUTBOX_RETRY_DELAY, (
+            'Проверьте, что пауза между попытками растет.'
+        )
+        OutboxEmail.objects.update(
+            attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            next_attempt_at=timezone.now())
+        assert deliver() == (0, 0)
+
+    def test_04_rolling_mailbox(self, settings, tmp_path):
+        settings.EMAIL_BACKEND = 'users.mail.RollingFileEmailBackend'
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        enqueue(2)
+        deliver(batch_size=1)
+        deliver(batch_size=1)
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1, (
+            'Проверьте, что письма за день пишутся в один файл.'
+        )
+        assert files[0].read_text().count('Subject: ') == 2
+
+    def test_05_claimed_batch(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_23_email_outbox.ConcurrentBackend'
+        ConcurrentBackend.concurrent.clear()
+        enqueue(3)
+        assert deliver() == (3, 0)
+        assert ConcurrentBackend.concurrent == [(0, 0)], (
+            'Проверьте, что пачка писем занимается до отправки и '
+            'параллельный send_emails ее не отправляет.'
+        )
+        assert len(mail.outbox) == 3
+
+    def test_06_claim_expires(self):
+        enqueue(3)
+        # процесс занял пачку и упал, не отправив ее
+        assert len(claim(2)) == 2
+        assert deliver() == (1, 0)
+        assert deliver() == (0, 0)
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        assert deliver() == (2, 0), (
+            'Проверьте, что письма упавшего процесса отправляются '
+            'после EMAIL_OUTBOX_CLAIM_TIMEOUT.'
+        )
+        assert len(mail.outbox) == 3
@@ -0,0 +1,64 @@
+import pytest
+
+from reviews.models import ScoreHistogram
+from tests.utils import create_catalog
+
+URL = '/api/v1/titles/scores/'
+
+
+def empty_scores(**counts):
+    scores = {str(score): 0 for score in range(1, 11)}
+    scores.update({str(score): count for score, count in counts.items()})
+    return scores
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Scores:
+
+    def test_01_scores(self, client, user_client, moderator_client,
+                       django_assert_max_num_queries):
+        titles = create_catalog(3)
+        for api_client, score in ((user_client, 7), (moderator_client, 9)):
+            response = api_client.post(
+                f'/api/v1/titles/{titles[0].id}/reviews/',
+                data={'text': 'Отзыв', 'score': score})
+            assert response.status_code == 201
+        ids = ','.join(str(title.id) for title in titles)
+        with django_assert_max_num_queries(1):
+            response = client.get(f'{URL}?ids={ids}')
+        assert response.status_code == 200
+        assert response.json() == [
+            {'id': titles[0].id, 'scores': empty_scores(**{'7': 1, '9': 1})},
+            {'id': titles[1].id, 'scores': empty_scores()},
+            {'id': titles[2].id, 'scores': empty_scores()},
+        ], (
+            f'Проверьте, что GET-запрос к `{URL}?ids=` возвращает '
+            'распределения оценок произведений, без отзывов - нулевые.'
+        )
+
+        url = f'/api/v1/titles/{titles[0].id}/reviews/'
+        review = client.get(url).json()['results'][0]
+        moderator_client.patch(f'{url}{review["id"]}/', data={'score': 2})
+        moderator_client.delete(f'{url}{review["id"]}/')
+        scores = client.get(f'{URL}?ids={titles[0].id}').json()[0]['scores']
+        assert scores == empty_scores(**{'7': 1}), (
+            'Проверьте, что правка и удаление отзыва меняют '
+            'распределение оценок.'
+        )
+
+    @pytest.mark.parametrize('ids', ('x', '1,y', ','.join(
+        str(idx) for idx in range(1, 102))))
+    def test_02_bad_ids(self, client, ids):
+        assert client.get(f'{URL}?ids={ids}').status_code == 400
+
+    def test_03_shift(self):
+        title = create_catalog(1)[0]
+        # строки нет: снятую оценку вычитать не из чего
+        ScoreHistogram.objects.shift(title.id, removed=5)
+        assert not ScoreHistogram.objects.exists()
+        ScoreHistogram.objects.shift(title.id, added=5, removed=3)
+        ScoreHistogram.objects.shift(title.id, added=5)
+        ScoreHistogram.objects.shift(title.id, added=4, removed=5)
+        ScoreHistogram.objects.shift(title.id, added=4, removed=4)
+        assert ScoreHistogram.objects.get().as_dict() == {
+            score: int(score in (4, 5)) for score in range(1, 11)}
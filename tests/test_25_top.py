@@ -0,0 +1,129 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from reviews.models import (Category, Genre, RankingPrior, Review, Title,
+                            TitleRanking)
+from tests.utils import create_catalog
+
+URL = '/api/v1/titles/top/'
+
+
+def create_rankings(django_user_model):
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    horror = Genre.objects.create(name='Ужасы', slug='horror')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    users = [django_user_model.objects.create_user(
+        username=f'critic{idx}', email=f'critic{idx}@yamdb.fake')
+        for idx in range(4)]
+    titles = {}
+    for name, category, genre, scores in (
+            ('A', films, horror, (10, 10, 10)),
+            ('B', books, comedy, (9,)),
+            ('C', films, comedy, (6, 6))):
+        title = Title.objects.create(name=name, year=2000, category=category)
+        title.genre.set([genre])
+        for user, score in zip(users, scores):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score)
+        titles[name] = title
+    Title.objects.all().recalculate_rating()
+    TitleRanking.objects.refresh()
+    return titles, users
+
+
+def get_top(client, params=''):
+    response = client.get(f'{URL}?{params}')
+    assert response.status_code == 200
+    return [(title['name'], title['weighted_rating'])
+            for title in response.json()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Top:
+
+    def test_01_scopes(self, client, django_user_model):
+        create_rankings(django_user_model)
+        # средняя всех оценок 8.5 входит в рейтинг с весом 3 отзывов
+        assert get_top(client) == [
+            ('A', 9.25), ('B', 8.625), ('C', 7.5)], (
+            f'Проверьте, что GET-запрос к `{URL}` возвращает произведения '
+            'по убыванию взвешенного рейтинга.'
+        )
+        assert get_top(client, 'genre=comedy') == [
+            ('B', 8.625), ('C', 7.5)]
+        assert get_top(client, 'category=films') == [('A', 9.25), ('C', 7.5)]
+        assert get_top(client, 'genre=comedy&category=films') == [
+            ('C', 7.5)]
+        assert get_top(client, 'genre=drama') == []
+        assert get_top(client, 'limit=1') == [('A', 9.25)]
+
+    def test_02_fixed_prior(self, client, django_user_model):
+        titles, users = create_rankings(django_user_model)
+        api_client = APIClient()
+        api_client.force_authenticate(users[3])
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post(
+                f'/api/v1/titles/{titles["C"].id}/reviews/',
+                data={'text': 'Отзыв', 'score': 10})
+        assert response.status_code == 201
+        assert not any('SUM(' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что новый отзыв не пересчитывает среднюю оценку '
+            'по всем произведениям.'
+        )
+        assert RankingPrior.objects.get_mean() == 8.5
+        top = dict(get_top(client))
+        assert top['A'] == 9.25 and top['B'] == 8.625, (
+            'Проверьте, что до полного пересчета рейтинги других '
+            'произведений не меняются.'
+        )
+        assert top['C'] == pytest.approx((22 + 3 * 8.5) / 6), (
+            'Проверьте, что рейтинг произведения с новым отзывом '
+            'пересчитан с той же средней оценкой.'
+        )
+
+        call_command('refresh_rankings', stdout=StringIO())
+        mean = 61 / 7
+        assert RankingPrior.objects.get_mean() == pytest.approx(mean)
+        assert dict(get_top(client))['A'] == pytest.approx(
+            (30 + 3 * mean) / 6)
+
+    def test_03_prior_without_refresh(self, client, django_user_model):
+        first, second = create_catalog(2)
+        clients = []
+        for idx in range(10):
+            api_client = APIClient()
+            api_client.force_authenticate(
+                django_user_model.objects.create_user(
+                    username=f'critic{idx}', email=f'critic{idx}@yamdb.fake'))
+            clients.append(api_client)
+
+        def post(api_client, title, score):
+            response = api_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Отзыв', 'score': score})
+            assert response.status_code == 201
+
+        post(clients[0], first, 10)
+        assert not RankingPrior.objects.exists(), (
+            'Проверьте, что средняя оценка по одному отзыву не сохраняется.'
+        )
+        assert dict(get_top(client)) == {first.name: 10}
+        for api_client in clients:
+            post(api_client, second, 3)
+        # средняя сохранена на третьем отзыве: (10 + 3 + 3) / 3
+        mean = 16 / 3
+        assert RankingPrior.objects.get_mean() == pytest.approx(mean)
+        assert get_top(client) == [
+            (first.name, pytest.approx((10 + 3 * mean) / 4)),
+            (second.name, pytest.approx((30 + 3 * mean) / 13)),
+        ], (
+            'Проверьте, что без полного пересчета рейтинги считаются '
+            'со средней оценкой отзывов, а не с нулем.'
+        )
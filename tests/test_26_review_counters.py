@@ -0,0 +1,95 @@
+import pytest
+
+from reviews.models import Review, ScoreHistogram, Title, TitleRanking
+from tests.utils import create_catalog
+
+
+def get_stats(title):
+    title = Title.objects.get(id=title.id)
+    histogram = ScoreHistogram.objects.filter(title=title).first()
+    return {
+        'score_sum': title.score_sum,
+        'reviews_count': title.reviews_count,
+        'rating': title.rating,
+        'scores': {score: count for score, count in (
+            histogram.as_dict().items() if histogram else ()) if count},
+        'rankings': TitleRanking.objects.filter(title=title).count(),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ReviewCounters:
+
+    def test_01_api(self, user_client, moderator_client):
+        title = create_catalog(1)[0]
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        review = user_client.post(
+            url, data={'text': 'Отзыв', 'score': 9}).json()
+        moderator_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        # общий рейтинг, два жанра и категория
+        assert get_stats(title) == {
+            'score_sum': 14, 'reviews_count': 2, 'rating': 7,
+            'scores': {9: 1, 5: 1}, 'rankings': 4}, (
+            'Проверьте, что новый отзыв учитывается в рейтинге, '
+            'распределении оценок и рейтингах произведения.'
+        )
+
+        user_client.patch(f'{url}{review["id"]}/', data={'score': 3})
+        assert get_stats(title) == {
+            'score_sum': 8, 'reviews_count': 2, 'rating': 4,
+            'scores': {3: 1, 5: 1}, 'rankings': 4}, (
+            'Проверьте, что правка оценки меняет рейтинг произведения.'
+        )
+
+        user_client.delete(f'{url}{review["id"]}/')
+        assert get_stats(title) == {
+            'score_sum': 5, 'reviews_count': 1, 'rating': 5,
+            'scores': {5: 1}, 'rankings': 4}
+
+    def test_02_orm(self, user, user_client):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=8)
+        assert get_stats(title)['reviews_count'] == 1, (
+            'Проверьте, что отзыв, созданный не через API, '
+            'учитывается в рейтинге произведения.'
+        )
+        review.score = 6
+        review.save()
+        assert get_stats(title)['rating'] == 6
+        response = user_client.delete(
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/')
+        assert response.status_code == 204
+        assert get_stats(title) == {
+            'score_sum': 0, 'reviews_count': 0, 'rating': None,
+            'scores': {}, 'rankings': 0}
+
+    def test_03_author_deleted(self, admin_client, user, moderator):
+        titles = create_catalog(2)
+        for title, score in zip(titles, (9, 4)):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=score)
+        Review.objects.create(
+            title=titles[1], author=moderator, text='Отзыв', score=8)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert get_stats(titles[0]) == {
+            'score_sum': 0, 'reviews_count': 0, 'rating': None,
+            'scores': {}, 'rankings': 0}, (
+            'Проверьте, что после удаления автора его отзывы не '
+            'учитываются в рейтинге произведений.'
+        )
+        assert get_stats(titles[1]) == {
+            'score_sum': 8, 'reviews_count': 1, 'rating': 8,
+            'scores': {8: 1}, 'rankings': 4}
+
+    def test_04_title_deleted(self, admin_client, user, moderator):
+        title = create_catalog(1)[0]
+        for author in (user, moderator):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=7)
+        response = admin_client.delete(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 204
+        assert not Title.objects.exists()
+        assert not TitleRanking.objects.exists()
+        assert not ScoreHistogram.objects.exists()
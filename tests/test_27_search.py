@@ -0,0 +1,81 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+URL_TITLES = '/api/v1/titles/'
+URL_REVIEWS = '/api/v1/reviews/search/'
+
+
+def search(client, url, text):
+    response = client.get(url, data={'search': text})
+    assert response.status_code == 200
+    return response.json()['results']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Search:
+
+    def test_01_cyrillic_case(self, client):
+        title = create_catalog(1)[0]
+        title.description = 'Роман о ПРЕСТУПЛЕНИИ и наказании'
+        title.save()
+        for text in ('преступлении', 'ПРОИЗВЕДЕНИЕ', 'Наказ'):
+            results = search(client, URL_TITLES, text)
+            assert [result['id'] for result in results] == [title.id], (
+                f'Проверьте, что поиск `{URL_TITLES}?search=` по кириллице '
+                'не зависит от регистра и находит слова по началу.'
+            )
+        assert search(client, URL_TITLES, 'преступление') == []
+
+    def test_02_triggers(self, client):
+        title = create_catalog(1)[0]
+        title.name = 'Мастер и Маргарита'
+        title.save()
+        assert search(client, URL_TITLES, 'Произведение') == [], (
+            'Проверьте, что после изменения названия поиск не находит '
+            'произведение по старому названию.'
+        )
+        assert len(search(client, URL_TITLES, 'маргарита')) == 1
+        Title.objects.filter(id=title.id).update(name='Собачье сердце')
+        assert len(search(client, URL_TITLES, 'собачье')) == 1
+        title.delete()
+        assert search(client, URL_TITLES, 'собачье') == [], (
+            'Проверьте, что удаленное произведение пропадает из поиска.'
+        )
+
+    def test_03_reviews(self, client, user, moderator,
+                        django_assert_max_num_queries):
+        titles = create_catalog(2)
+        Review.objects.create(
+            title=titles[0], author=user, score=5,
+            text='Скучный фильм, <script>alert(1)</script> скучный финал')
+        Review.objects.create(
+            title=titles[0], author=moderator, score=8, text='Отличный фильм')
+        review = Review.objects.create(
+            title=titles[1], author=user, score=7, text='Фильм на вечер')
+        results = search(client, URL_REVIEWS, 'скучн')
+        assert len(results) == 1
+        assert results[0]['snippet'] == (
+            '<b>Скучный</b> фильм, &lt;script&gt;alert(1)&lt;/script&gt; '
+            '<b>скучный</b> финал'), (
+            f'Проверьте, что `{URL_REVIEWS}` экранирует текст сниппета '
+            'и выделяет совпадения тегом <b>.'
+        )
+        assert len(search(client, URL_REVIEWS, 'ФИЛЬМ')) == 3
+        response = client.get(
+            URL_REVIEWS, data={'search': 'фильм', 'title': titles[1].id})
+        assert [result['id'] for result in response.json()['results']] == [
+            review.id]
+        assert search(client, URL_REVIEWS, '') == []
+        assert search(client, URL_REVIEWS, '"*') == []
+
+        with CaptureQueriesContext(connection) as context:
+            search(client, URL_REVIEWS, 'фильм')
+        for query in context.captured_queries:
+            assert query['sql'].count('MATCH') <= 1, (
+                'Проверьте, что поиск соединяется с индексом FTS5 один раз, '
+                'без подзапросов для каждой строки.'
+            )
@@ -0,0 +1,77 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from api.cache import get_cache
+from reviews.models import Category, Genre, Title
+
+URL = '/api/v1/titles/'
+PARAMS = (
+    '', 'page=2', 'genre=horror', 'genre=HOR', 'category=films',
+    'category=books&genre=comedy', 'year=2001', 'year=1990',
+    'name=Равный', 'genre=drama', 'fields=id,rating',
+)
+
+
+def create_titles():
+    films = Category.objects.create(name='Фильм', slug='films')
+    books = Category.objects.create(name='Книга', slug='books')
+    horror = Genre.objects.create(name='Ужасы', slug='horror')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    # одинаковые рейтинги и произведения без оценок проверяют порядок
+    # при равных ключах и место NULL
+    for idx in range(14):
+        title = Title.objects.create(
+            name='Равный' if idx % 3 == 0 else f'Произведение {idx}',
+            year=2000 + idx % 2,
+            category=(films, books, None)[idx % 3],
+            rating=None if idx % 4 == 0 else idx % 3 + 5)
+        title.genre.set([(horror,), (comedy,), (horror, comedy), ()][idx % 4])
+
+
+def get_pages(client):
+    # ответы кэшируются без учета движка, поэтому кэш сбрасывается
+    get_cache().clear()
+    pages = {}
+    for params in PARAMS:
+        response = client.get(f'{URL}?{params}')
+        assert response.status_code == 200
+        pages[params] = response.json()
+    return pages
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+    settings.CATALOG_SNAPSHOT_DIR = tmp_path / 'catalog'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28CatalogEngine:
+
+    def test_01_same_results(self, client, settings, shared_cache):
+        create_titles()
+        expected = get_pages(client)
+        settings.CATALOG_ENGINE_ENABLED = True
+        assert get_pages(client) == expected, (
+            f'Проверьте, что с CATALOG_ENGINE_ENABLED GET-запрос к `{URL}` '
+            'возвращает те же произведения в том же порядке.'
+        )
+        Title.objects.filter(rating__isnull=True).update(rating=6)
+        Title.objects.first().delete()
+        changed = get_pages(client)
+        settings.CATALOG_ENGINE_ENABLED = False
+        assert changed == get_pages(client), (
+            'Проверьте, что снимок каталога пересобирается после '
+            'изменения произведений.'
+        )
+
+    def test_02_local_cache(self, client, settings, tmp_path):
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        settings.CATALOG_SNAPSHOT_DIR = tmp_path
+        settings.CATALOG_ENGINE_ENABLED = True
+        with pytest.raises(ImproperlyConfigured):
+            client.get(URL)
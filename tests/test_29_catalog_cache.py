@@ -0,0 +1,102 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.cache import reset_stats
+from reviews.models import Category, Genre, Review
+from tests.utils import create_catalog
+
+URL = '/api/v1/titles/'
+
+
+def get(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get('X-Cache'), response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29CatalogCache:
+
+    def test_01_hit_and_miss(self, client, django_assert_num_queries):
+        title = create_catalog(2)[0]
+        reset_stats()
+        for url in (URL, f'{URL}{title.id}/', f'{URL}?year=2000&genre=h'):
+            assert get(client, url)[0] == 'MISS'
+            with django_assert_num_queries(1):
+                # валидаторы условного GET читаются и при попадании
+                cache_status, data = get(client, url)
+            assert cache_status == 'HIT', (
+                f'Проверьте, что повторный GET-запрос к `{url}` '
+                'отвечается из кэша.'
+            )
+        assert get(client, f'{URL}?genre=h&year=2000&page=')[0] == 'HIT', (
+            'Проверьте, что порядок и пустые значения параметров '
+            'не меняют ключ кэша.'
+        )
+        assert get(client, f'{URL}?year=2001')[0] == 'MISS'
+        response = client.get(f'{URL}{title.id}/?embed=reviews')
+        assert 'X-Cache' not in response
+
+        out = StringIO()
+        call_command('cache_stats', '--reset', stdout=out)
+        assert 'hits: 4\nmisses: 4\n' in out.getvalue()
+        call_command('cache_stats', stdout=out)
+        assert out.getvalue().endswith(
+            'hits: 0\nmisses: 0\nhit ratio: 0.00%\n')
+
+    def test_02_invalidation(self, client, admin_client, user_client):
+        title = create_catalog(1)[0]
+        detail = f'{URL}{title.id}/'
+
+        def changed(url=URL):
+            # первый запрос после изменения каталога идет мимо кэша
+            cache_status, data = get(client, url)
+            assert cache_status == 'MISS', (
+                'Проверьте, что изменение каталога сбрасывает кэш ответов.'
+            )
+            assert get(client, url)[0] == 'HIT'
+            return data
+
+        changed()
+        changed(detail)
+        admin_client.patch(detail, data={'name': 'Новое название'})
+        assert changed()['results'][0]['name'] == 'Новое название'
+        assert changed(detail)['name'] == 'Новое название'
+
+        Genre.objects.filter(slug='horror').get().delete()
+        assert [genre['slug'] for genre in changed(detail)['genre']] == [
+            'comedy']
+        category = Category.objects.get()
+        category.name = 'Кино'
+        category.save()
+        assert changed(detail)['category']['name'] == 'Кино'
+        title.genre.clear()
+        assert changed(detail)['genre'] == []
+
+        user_client.post(
+            f'{detail}reviews/', data={'text': 'Отзыв', 'score': 8})
+        assert changed(detail)['rating'] == 8
+        Review.objects.get().delete()
+        assert changed(detail)['rating'] is None
+
+        admin_client.delete(detail)
+        assert changed()['results'] == []
+
+    def test_03_absolute_links(self, client):
+        create_catalog(12)
+        for host, secure in (('first.example', False),
+                             ('second.example', False),
+                             ('second.example', True)):
+            response = client.get(URL, HTTP_HOST=host, secure=secure)
+            assert response['X-Cache'] == 'MISS'
+            scheme = 'https' if secure else 'http'
+            assert response.json()['next'].startswith(
+                f'{scheme}://{host}/'), (
+                'Проверьте, что ответ из кэша не отдает ссылки next '
+                'и previous с хостом или схемой другого клиента.'
+            )
+        response = client.get(URL, HTTP_HOST='first.example')
+        assert response['X-Cache'] == 'HIT'
+        assert response.json()['next'].startswith('http://first.example/')
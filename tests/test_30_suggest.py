@@ -0,0 +1,74 @@
+import pytest
+
+from api.cache import bump_generation
+from api.suggest import title_index
+from reviews.models import Review, Title
+from tests.utils import create_catalog
+
+
+def names(prefix, limit=10):
+    return [title['name'] for title in title_index.suggest(prefix, limit)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30Suggest:
+
+    def test_01_suggest(self, user, moderator):
+        titles = create_catalog(3)
+        titles[0].name = 'Ёжик в тумане'
+        titles[0].save()
+        titles[1].name = 'Туман'
+        titles[1].save()
+        for author, score in ((user, 9), (moderator, 7)):
+            Review.objects.create(
+                title=titles[1], author=author, text='Отзыв', score=score)
+        assert names('ТУМ') == ['Туман', 'Ёжик в тумане'], (
+            'Проверьте, что подсказки ищут по началу любого слова '
+            'без учета регистра, популярные первыми.'
+        )
+        assert names('ежик') == ['Ёжик в тумане']
+        assert names('в тум') == ['Ёжик в тумане']
+        assert names('тум', limit=1) == ['Туман']
+        assert names('  ') == []
+        assert names('роман') == []
+
+    def test_02_local_changes(self, user, django_assert_num_queries):
+        title = create_catalog(1)[0]
+        assert names('произв') == ['Произведение 0']
+        title.name = 'Мастер и Маргарита'
+        title.save()
+        other = Title.objects.create(name='Маргаритки', year=2000)
+        Review.objects.create(title=other, author=user, text='Отзыв', score=5)
+        with django_assert_num_queries(0):
+            assert names('маргар') == ['Маргаритки', 'Мастер и Маргарита'], (
+                'Проверьте, что изменения этого процесса попадают '
+                'в индекс подсказок без его пересборки.'
+            )
+            assert names('произв') == []
+        other.delete()
+        with django_assert_num_queries(0):
+            assert names('маргар') == ['Мастер и Маргарита']
+
+    def test_03_other_process(self, django_assert_num_queries):
+        titles = create_catalog(2)
+        assert names('произв') == ['Произведение 1', 'Произведение 0']
+        # другой процесс меняет каталог: сигналов здесь нет,
+        # остается только новое поколение каталога
+        Title.objects.filter(id=titles[0].id).update(name='Мастер')
+        bump_generation()
+        with django_assert_num_queries(1):
+            assert names('произв') == ['Произведение 1'], (
+                'Проверьте, что индекс подсказок пересобирается после '
+                'изменения каталога другим процессом.'
+            )
+        assert names('мастер') == ['Мастер']
+
+        Title.objects.filter(id=titles[0].id).update(name='Маргарита')
+        bump_generation()
+        titles[1].name = 'Мастерская'
+        titles[1].save()
+        assert names('мастер') == ['Мастерская'], (
+            'Проверьте, что изменение другого процесса не теряется, '
+            'если этот процесс тоже изменил каталог.'
+        )
+        assert names('маргар') == ['Маргарита']
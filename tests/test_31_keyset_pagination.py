@@ -0,0 +1,119 @@
+import base64
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+
+URL = '/api/v1/titles/'
+
+
+def create_titles(size):
+    # равные рейтинги на границах страниц и хвост без рейтинга
+    return [Title.objects.create(
+        name=f'Произведение {idx}', year=2000,
+        rating=None if idx % 3 == 0 else idx % 4 + 5) for idx in range(size)]
+
+
+def expected_ids():
+    # NULL в SQLite при DESC идет последним
+    return list(Title.objects.order_by('-rating', '-id').values_list(
+        'id', flat=True))
+
+
+def get_page(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    return [title['id'] for title in data['results']], data
+
+
+def walk(client, url, link):
+    # страницы по ссылкам link и ответ с последней из них
+    pages = []
+    while url:
+        ids, data = get_page(client, url)
+        pages.append(ids)
+        url = data[link]
+    return pages, data
+
+
+def encode(data):
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31KeysetPagination:
+
+    def test_01_round_trip(self, client):
+        create_titles(34)
+        pages, last = walk(client, f'{URL}?pagination=cursor', 'next')
+        assert [len(page) for page in pages] == [10, 10, 10, 4]
+        assert sum(pages, []) == expected_ids(), (
+            f'Проверьте, что страницы `{URL}?pagination=cursor` идут '
+            'по рейтингу, затем по id, произведения без рейтинга - '
+            'последними, без пропусков и повторов.'
+        )
+        backward, first = walk(client, last['previous'], 'previous')
+        assert backward == pages[-2::-1], (
+            'Проверьте, что ссылки previous возвращают те же страницы '
+            'в обратном порядке.'
+        )
+        assert first['previous'] is None
+        assert get_page(client, first['next'])[0] == pages[1]
+
+    def test_02_null_segment(self, client):
+        titles = create_titles(24)
+        nulls = [title.id for title in reversed(titles)
+                 if title.rating is None]
+        rated = [title_id for title_id in expected_ids()
+                 if title_id not in nulls]
+        pages, last = walk(client, f'{URL}?pagination=cursor', 'next')
+        assert pages[1] == rated[10:] + nulls[:4]
+        assert pages[2] == nulls[4:], (
+            'Проверьте, что страница внутри произведений без рейтинга '
+            'продолжается по id.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            ids, previous = get_page(client, last['previous'])
+        assert ids == pages[1]
+        assert get_page(client, previous['previous'])[0] == pages[0]
+        assert not any('OFFSET' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что страницы по курсору выбираются по ключу, '
+            'без OFFSET.'
+        )
+
+    def test_03_concurrent_inserts(self, client):
+        titles = create_titles(25)
+        seen, data = get_page(client, f'{URL}?pagination=cursor')
+        # новые произведения до курсора, после него и без рейтинга
+        for rating in (10, 9, 6, 5, None):
+            Title.objects.create(name='Новое', year=2000, rating=rating)
+        Title.objects.filter(id=titles[1].id).delete()
+        pages, _ = walk(client, data['next'], 'next')
+        seen += sum(pages, [])
+        assert len(seen) == len(set(seen)), (
+            'Проверьте, что вставка произведений между запросами страниц '
+            'не приводит к повторам.'
+        )
+        old = [title.id for title in titles if title.id != titles[1].id]
+        assert set(old) <= set(seen), (
+            'Проверьте, что вставка произведений между запросами страниц '
+            'не приводит к пропускам.'
+        )
+
+    @pytest.mark.parametrize('cursor', (
+        'не-base64', encode(['list']), encode({'v': 5}),
+        encode({'v': 'x', 'id': 1, 'r': False}),
+        encode({'v': 5, 'id': 'x', 'r': False}),
+        base64.urlsafe_b64encode(b'\xff{').decode(),
+    ))
+    def test_04_invalid_cursor(self, client, cursor):
+        create_titles(3)
+        response = client.get(URL, data={'cursor': cursor})
+        assert response.status_code == 404, (
+            f'Проверьте, что `{URL}` с неверным курсором возвращает 404.'
+        )
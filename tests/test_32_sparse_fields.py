@@ -0,0 +1,84 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+from tests.utils import create_catalog
+
+COLUMN = re.compile(r'"(\w+)"\."(\w+)"')
+
+
+def get_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), [query['sql'] for query in context.captured_queries
+                             if 'MAX(' not in query['sql']]
+
+
+def selected(sql, table):
+    # столбцы таблицы в списке SELECT запроса
+    columns = sql.split(' FROM ', 1)[0]
+    return {column for name, column in COLUMN.findall(columns)
+            if name == table}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32SparseFields:
+
+    def test_01_title(self, client):
+        title = create_catalog(2)[0]
+        url = f'/api/v1/titles/{title.id}/'
+        data, queries = get_queries(client, f'{url}?fields=id,name')
+        assert data == {'id': title.id, 'name': title.name}
+        assert len(queries) == 1, (
+            'Проверьте, что ?fields= без жанров не загружает жанры '
+            'отдельным запросом.'
+        )
+        assert selected(queries[0], 'reviews_title') == {'id', 'name'}, (
+            'Проверьте, что ?fields= откладывает невыбранные столбцы.'
+        )
+        assert 'JOIN' not in queries[0], (
+            'Проверьте, что ?fields= без категории не присоединяет '
+            'таблицу категорий.'
+        )
+
+        data, queries = get_queries(client, f'{url}?exclude=genre,category')
+        assert 'genre' not in data and 'category' not in data
+        assert len(queries) == 1
+        assert 'reviews_category' not in queries[0]
+        assert 'description' in selected(queries[0], 'reviews_title')
+
+    def test_02_title_list(self, client):
+        create_catalog(2)
+        data, queries = get_queries(client, '/api/v1/titles/?fields=id,genre')
+        assert [set(title) for title in data['results']] == [
+            {'id', 'genre'}] * 2
+        assert len(queries) == 2 and 'reviews_title_genre' in queries[1], (
+            'Проверьте, что жанры из ?fields= загружаются одним запросом.'
+        )
+        assert 'JOIN' not in queries[0]
+        assert selected(queries[0], 'reviews_title') == {'id'}
+
+    def test_03_reviews_and_comments(self, client, user):
+        title = create_catalog(1)[0]
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=5)
+        Comment.objects.create(review=review, author=user, text='Ответ')
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data, queries = get_queries(client, f'{url}?fields=id,score')
+        assert data['results'] == [{'id': review.id, 'score': 5}]
+        assert selected(queries[-1], 'reviews_review') == {'id', 'score'}
+        assert 'users_user' not in queries[-1], (
+            'Проверьте, что ?fields= без автора не присоединяет '
+            'таблицу пользователей.'
+        )
+        data, queries = get_queries(
+            client, f'{url}{review.id}/comments/?exclude=author,pub_date')
+        comment = data['results'][0]
+        assert comment['text'] == 'Ответ'
+        assert 'author' not in comment and 'pub_date' not in comment
+        assert 'users_user' not in queries[-1]
+        assert 'pub_date' not in selected(queries[-1], 'reviews_comment')
@@ -1,5 +1,7 @@
 from http import HTTPStatus
 
+from reviews.models import Category, Comment, Genre, Review, Title
+
 check_name_and_slug_patterns = (
     (
         {
@@ -304,3 +306,37 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def create_catalog(size):
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name='Ужасы', slug='horror'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+    titles = []
+    for idx in range(size):
+        title = Title.objects.create(
+            name=f'Произведение {idx}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        titles.append(title)
+    return titles
+
+
+def create_thread(django_user_model, title, reviews, comments):
+    users = [
+        django_user_model.objects.create_user(
+            username=f'reader{idx}', email=f'reader{idx}@yamdb.fake')
+        for idx in range(reviews)
+    ]
+    for idx, user in enumerate(users):
+        review = Review.objects.create(
+            title=title, author=user, text=f'Отзыв {idx}',
+            score=idx % 10 + 1)
+        for number in range(comments * idx % 5):
+            Comment.objects.create(
+                review=review, author=users[0], text=f'Ответ {number}')
+    Title.objects.filter(id=title.id).recalculate_rating()
+    Review.objects.filter(title=title).recalculate_comments()
+    return users